@@ -11,6 +11,8 @@ from nacsos_data.db import DatabaseEngine
 from nacsos_data.util.academic.apis import APIEnum
 
 
+from openalex_ingest.shared.batching import AdaptiveBatchSize
+from openalex_ingest.shared.spool import DeadLetterSpool
 from openalex_ingest.shared.models import OnConflict, SourcePriority
 from openalex_ingest.shared.schema import Request, Queue
 from openalex_ingest.shared.solr import write_cache_records_to_solr, get_entries_with_missing_abstracts
@@ -25,6 +27,10 @@ def transfer_abstracts(
     read_batch_size: Annotated[int, typer.Option(help='Batch size')] = 10000,
     post_batch_size: Annotated[int, typer.Option(help='Batch size')] = 10000,
     commit_interval: Annotated[int, typer.Option(help='Batch size')] = 50000,
+    max_inflight: Annotated[int, typer.Option(help='Number of update requests to keep open at once (1 = sequential)')] = 1,
+    adaptive: Annotated[bool, typer.Option(help='Adapt --post-batch-size to solr latency and errors')] = False,
+    target_latency: Annotated[float, typer.Option(help='Seconds per update request the adaptive batch size aims for')] = 5.0,
+    spool_dir: Annotated[Path | None, typer.Option(help='Keep going and write failed batches here instead of aborting (see `snapshot replay-failed`)')] = None,
     force_overwrite: Annotated[bool, typer.Option(help="Use this flag to overwrite existing abstracts in solr, otherwise we'll check first")] = False,
     created_after: Annotated[datetime | None, typer.Option(help='Filter queue to entries added after this date')] = None,
     created_before: Annotated[datetime | None, typer.Option(help='Filter queue to entries added before this date')] = None,
@@ -48,6 +54,8 @@ def transfer_abstracts(
         creation_filter += ' AND time_created >= :created_after'
 
     logger.info(f'Will use solr collection at: {settings.OPENALEX.solr_url}')
+    sizer = AdaptiveBatchSize(post_batch_size, target_latency=target_latency, name='transfer') if adaptive else None
+    spool = DeadLetterSpool(spool_dir, name='transfer', url=f'{settings.OPENALEX.solr_url}/update/json') if spool_dir is not None else None
     with db_engine.session() as session:
         n_total = 0
         n_skipped = 0
@@ -103,6 +111,9 @@ def transfer_abstracts(
                 commit_interval=commit_interval,
                 force=force_overwrite,
                 logger_=solr_logger,
+                max_inflight=max_inflight,
+                sizer=sizer,
+                spool=spool,
             )
             n_total += n_total_
             n_skipped += n_skipped_
@@ -121,6 +132,9 @@ def transfer_abstracts(
             progress.update(len(records))
         progress.close()
 
+    if spool is not None and spool.n_batches > 0:
+        logger.warning(f'{spool.n_docs:,} documents failed to post, re-post them with `snapshot replay-failed --spool-dir={spool_dir}`')
+
 
 def _queue_missing_abstracts(
     data: Iterable[tuple[str, str, str | None]],
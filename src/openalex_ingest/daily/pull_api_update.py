@@ -9,6 +9,7 @@ from json.decoder import JSONDecodeError
 from nacsos_data.models.openalex import WorksSchema
 from nacsos_data.util.academic.apis.openalex import OpenAlexAPI
 
+from openalex_ingest.shared.batching import AdaptiveBatchSize
 from openalex_ingest.shared.crud import queue_requests
 from openalex_ingest.shared.schema import Queue
 from openalex_ingest.shared.solr import write_api_update_to_solr
@@ -23,6 +24,8 @@ def load_updated_records_from_api(
     config: Annotated[Path, typer.Option(help='Path to config file')],
     date: Annotated[datetime, typer.Option(help='Get works created or updated on this day')],
     solr_buffer_size: int = 200,
+    adaptive: Annotated[bool, typer.Option(help='Adapt --solr-buffer-size to solr latency and errors')] = False,
+    target_latency: Annotated[float, typer.Option(help='Seconds per update request the adaptive batch size aims for')] = 5.0,
     loglevel: str = 'INFO',
 ):
     logger, settings, db_engine = prepare_runner(config=config, loglevel=loglevel, logger_name='openalex-ingest', run_log_init=True)
@@ -30,25 +33,23 @@ def load_updated_records_from_api(
     logger.info(f'Will use solr collection at: {settings.OPENALEX.solr_url}')
 
     for fltr in ['created', 'updated']:
-        for batch in batched(
-            OpenAlexAPI(
-                api_key=settings.OPENALEX.API_KEY,
-                logger=logger.getChild(f'ingest-{fltr}-{date.strftime("%Y-%m-%d")}'),
-                split_larger=500000,
-                ignored_exceptions=[JSONDecodeError],
-            ).fetch_raw(
-                query='',
-                params={
-                    'filter': f'from_{fltr}_date:{date.strftime("%Y-%m-%d")},to_{fltr}_date:{date.strftime("%Y-%m-%d")},',
-                    'include_xpac': 'true',
-                },
-            ),
-            solr_buffer_size,
-            strict=False,
-        ):
+        sizer = AdaptiveBatchSize(solr_buffer_size, target_latency=target_latency, name=f'api-{fltr}') if adaptive else None
+        records = OpenAlexAPI(
+            api_key=settings.OPENALEX.API_KEY,
+            logger=logger.getChild(f'ingest-{fltr}-{date.strftime("%Y-%m-%d")}'),
+            split_larger=500000,
+            ignored_exceptions=[JSONDecodeError],
+        ).fetch_raw(
+            query='',
+            params={
+                'filter': f'from_{fltr}_date:{date.strftime("%Y-%m-%d")},to_{fltr}_date:{date.strftime("%Y-%m-%d")},',
+                'include_xpac': 'true',
+            },
+        )
+        for batch in sizer.batched(records) if sizer is not None else batched(records, solr_buffer_size, strict=False):
             works = [WorksSchema.model_validate(record) for record in batch]
             logger.debug(f'Got {len(works):,} works entries from API for "{fltr}", POSTing to solr...')
-            write_api_update_to_solr(config=settings.OPENALEX, works=works)
+            write_api_update_to_solr(config=settings.OPENALEX, works=works, sizer=sizer)
 
             # remember all Works without abstract and with DOI
             queue = [Queue(doi=w.doi, openalex_id=w.id) for w in works if w.id is not None and w.doi is not None and w.abstract is None]
@@ -65,6 +66,8 @@ def bulk_api_pull(
     from_date: Annotated[datetime, typer.Option(help='First day to start pulling updates from')],
     to_date: Annotated[datetime, typer.Option(help='Last day to include updates from')],
     solr_buffer_size: int = 200,
+    adaptive: Annotated[bool, typer.Option(help='Adapt --solr-buffer-size to solr latency and errors')] = False,
+    target_latency: Annotated[float, typer.Option(help='Seconds per update request the adaptive batch size aims for')] = 5.0,
     loglevel: str = 'INFO',
 ):
     logger = get_logger('BULK', loglevel=loglevel)
@@ -80,6 +83,8 @@ def bulk_api_pull(
             config=config,
             date=date,
             solr_buffer_size=solr_buffer_size,
+            adaptive=adaptive,
+            target_latency=target_latency,
             loglevel=loglevel,
         )
         date = date + timedelta(days=1)
@@ -10,6 +10,7 @@ from openalex_ingest.shared.models import SourcePriority
 from openalex_ingest.shared.schema import Queue
 from openalex_ingest.shared.solr import check_openalex_ids
 from openalex_ingest.shared.util import prepare_runner
+from openalex_ingest.snapshot.idindex import IdIndex
 
 
 def main(
@@ -17,6 +18,7 @@ def main(
     config: Annotated[Path, typer.Option(help='Path to config file')],
     sources: Annotated[list[str] | None, typer.Option(help='Sources to include')] = None,
     batch_size: Annotated[int, typer.Option(help='Batch size for processing')] = 5000,
+    id_index: Annotated[Path | None, typer.Option(help='Local ID index (see `snapshot id-index`) to skip works known to have an abstract')] = None,
     loglevel: Annotated[str, typer.Option(help='Path to config file')] = 'INFO',
 ):
     logger, settings, db_engine = prepare_runner(config=config, loglevel=loglevel, logger_name='openalex-backup', run_log_init=True)
@@ -27,13 +29,21 @@ def main(
     else:
         sources_ = [getattr(APIEnum, source) for source in sources]
 
+    index = IdIndex(id_index) if id_index is not None else None
+
     n_checked = 0
     n_missing_abstract = 0
     n_queued = 0
     with open(source) as f_in, db_engine.session() as session:
         for lines in batched(f_in, batch_size):
             ids = [line.strip() for line in lines]
-            missing_abstract_ids = check_openalex_ids(config=settings.OPENALEX, check_abstract=True, reference_ids=ids, return_fields='id,doi')
+            # Solr is still asked for the DOIs (and to confirm), but not for IDs the index knows to have an abstract
+            candidates = index.missing_abstract(ids) if index is not None else ids
+            missing_abstract_ids = (
+                check_openalex_ids(config=settings.OPENALEX, check_abstract=True, reference_ids=candidates, return_fields='id,doi')
+                if len(candidates) > 0
+                else []
+            )
             queue_entries = [
                 Queue(
                     openalex_id=entry['id'],
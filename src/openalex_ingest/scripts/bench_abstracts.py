@@ -0,0 +1,68 @@
+import logging
+from itertools import islice
+from pathlib import Path
+from time import perf_counter
+from typing import Annotated
+
+import typer
+from msgspec.json import Decoder
+from nacsos_data.models.openalex import invert_abstract
+
+from openalex_ingest.shared.decompress import read_lines
+from openalex_ingest.snapshot.match.structs import WorkAbstract
+from openalex_ingest.snapshot.translate import reconstruct_abstract
+
+logger = logging.getLogger('bench-abstracts')
+
+# Indices that are not a permutation of 0..n-1 (see `reconstruct_abstract` for how each case is handled)
+EDGE_CASES: list[dict[str, list[int]]] = [
+    {},
+    {'a': [0, 2], 'b': [2]},  # gap at position 1 and duplicate position 2
+    {'a': [1], 'b': [1]},  # duplicate position, nothing at position 0
+    {'a': [0, 10], 'b': [1]},  # out of range
+]
+
+
+def main(
+    snapshot: Annotated[Path, typer.Option(help='Path to openalex snapshot from S3')],
+    n_partitions: Annotated[int, typer.Option(help='Number of partitions to sample from')] = 3,
+    n_works: Annotated[int, typer.Option(help='Number of works to read per partition')] = 20000,
+    repeats: Annotated[int, typer.Option(help='Number of repetitions')] = 3,
+    loglevel: Annotated[str, typer.Option(help='Log level')] = 'INFO',
+):
+    """Compare `reconstruct_abstract` against nacsos_data's `invert_abstract` (speed and output) on snapshot samples and `EDGE_CASES`."""
+    logging.basicConfig(format='%(asctime)s [%(levelname)s] %(name)s (%(process)d): %(message)s', level=loglevel)
+    partitions = sorted(snapshot.glob('data/works/**/*.gz'))
+    step = max(1, len(partitions) // max(1, n_partitions))
+    decoder = Decoder(WorkAbstract)
+
+    indices = []
+    for partition in partitions[::step][:n_partitions]:
+        logger.info(f'Reading first {n_works:,} works from {partition}')
+        works = map(decoder.decode, islice(read_lines(partition), n_works))
+        indices += [work.abstract_inverted_index for work in works if work.abstract_inverted_index is not None]
+    n_tokens = sum(len(positions) for index in indices for positions in index.values())
+    logger.info(f'Loaded {len(indices):,} inverted indices with {n_tokens:,} tokens in total.')
+
+    for name, func in [('invert_abstract', invert_abstract), ('reconstruct_abstract', reconstruct_abstract)]:
+        times = []
+        for _ in range(repeats):
+            start = perf_counter()
+            for index in indices:
+                func(index)
+            times.append(perf_counter() - start)
+        logger.info(f'  {name:>20}: {min(times):.3f}s (best of {repeats}), {n_tokens / min(times) / 1e6:.1f}M tokens/s')
+
+    for index in EDGE_CASES:
+        if invert_abstract(index) != reconstruct_abstract(index):
+            logger.warning(f'Edge case {index} differs: {invert_abstract(index)!r} != {reconstruct_abstract(index)!r}')
+
+    n_different = sum(invert_abstract(index) != reconstruct_abstract(index) for index in indices)
+    if n_different > 0:
+        logger.warning(f'{n_different:,} / {len(indices):,} abstracts differ between both functions!')
+    else:
+        logger.info('All abstracts are identical.')
+
+
+if __name__ == '__main__':
+    typer.run(main)
@@ -0,0 +1,65 @@
+import logging
+from itertools import islice
+from pathlib import Path
+from statistics import median
+from time import perf_counter, process_time
+from typing import Annotated
+
+import typer
+import orjson as json
+from msgspec.json import Decoder
+
+from openalex_ingest.shared.decompress import read_lines
+from openalex_ingest.shared.solr import JsonBody, gzip_chunks
+from openalex_ingest.snapshot.match.structs import Work
+from openalex_ingest.snapshot.translate import translate_work
+
+logger = logging.getLogger('bench-compression')
+
+
+def main(
+    snapshot: Annotated[Path, typer.Option(help='Path to openalex snapshot from S3')],
+    batch_size: Annotated[int, typer.Option(help='Number of documents per update request (as --post-batchsize)')] = 1000,
+    n_batches: Annotated[int, typer.Option(help='Number of batches to sample from the latest partitions')] = 10,
+    levels: Annotated[list[int] | None, typer.Option(help='gzip levels to compare (default: 0, 1, 3, 6, 9)')] = None,
+    bandwidth: Annotated[float, typer.Option(help='Bandwidth of the link to solr in MB/s (to estimate transfer time)')] = 100,
+    repeats: Annotated[int, typer.Option(help='Number of repetitions per level')] = 3,
+    loglevel: Annotated[str, typer.Option(help='Log level')] = 'INFO',
+):
+    """Trade-off between bytes on the wire and CPU time for gzip-compressed update requests (see `--compress-level`)."""
+    logging.basicConfig(format='%(asctime)s [%(levelname)s] %(name)s (%(process)d): %(message)s', level=loglevel)
+    decoder = Decoder(Work)
+
+    # Recent partitions are the largest and have the most complete documents
+    docs: list[bytes] = []
+    for partition in sorted(snapshot.glob('data/works/**/*.gz'), reverse=True):
+        docs += [
+            json.dumps(translate_work(decoder.decode(line), source='OpenAlex', authorship_limit=50))
+            for line in islice(read_lines(partition), batch_size * n_batches - len(docs))
+        ]
+        if len(docs) >= batch_size * n_batches:
+            break
+    batches = [JsonBody(docs[bi : bi + batch_size]) for bi in range(0, len(docs), batch_size)]
+    n_bytes = sum(len(body) for body in batches)
+    logger.info(f'Compressing {len(batches):,} batches of {batch_size:,} documents ({n_bytes / len(batches) / 1024 / 1024:,.2f}MB per batch on average)')
+
+    for level in levels or [0, 1, 3, 6, 9]:
+        cpu_times = []
+        wall_times = []
+        n_compressed = 0
+        for _ in range(repeats):
+            start_wall, start_cpu = perf_counter(), process_time()
+            n_compressed = sum(len(chunk) for body in batches for chunk in (gzip_chunks(body, level) if level > 0 else body))
+            cpu_times.append(process_time() - start_cpu)
+            wall_times.append(perf_counter() - start_wall)
+        cpu = median(cpu_times) / len(batches)
+        transfer = n_compressed / len(batches) / 1024 / 1024 / bandwidth
+        logger.info(
+            f'  level {level}: {n_compressed / n_bytes:6.1%} of the original size, '
+            f'{cpu * 1000:7.1f}ms CPU + {transfer * 1000:7.1f}ms transfer = {(cpu + transfer) * 1000:7.1f}ms per batch '
+            f'({n_bytes / 1024 / 1024 / median(wall_times):,.0f}MB/s)'
+        )
+
+
+if __name__ == '__main__':
+    typer.run(main)
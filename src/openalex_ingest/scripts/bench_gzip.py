@@ -0,0 +1,78 @@
+import gzip
+import random
+import logging
+import tempfile
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Annotated
+
+import typer
+import orjson as json
+
+from openalex_ingest.shared.decompress import BLOCK_SIZE, available_backends, read_lines
+
+logger = logging.getLogger('bench-gzip')
+
+
+def write_synthetic_partition(path: Path, n_works: int) -> None:
+    """Write a gzipped JSONL file with works of roughly the size and shape of a snapshot partition."""
+    rng = random.Random(42)
+    vocabulary = [f'word{i}' for i in range(5000)]
+    with gzip.open(path, 'wb', compresslevel=6) as f_out:
+        for wi in range(n_works):
+            words = rng.choices(vocabulary, k=rng.randint(50, 300))
+            index: dict[str, list[int]] = {}
+            for pos, word in enumerate(words):
+                index.setdefault(word, []).append(pos)
+            work = {
+                'id': f'https://openalex.org/W{wi}',
+                'title': ' '.join(words[:12]),
+                'publication_year': rng.randint(1950, 2025),
+                'authorships': [{'author': {'id': f'https://openalex.org/A{rng.randint(0, 10**9)}'}} for _ in range(rng.randint(1, 12))],
+                'abstract_inverted_index': index,
+            }
+            f_out.write(json.dumps(work) + b'\n')
+
+
+def main(
+    partition: Annotated[Path | None, typer.Option(help='Gzipped JSONL partition to read (default: generate a synthetic one)')] = None,
+    n_works: Annotated[int, typer.Option(help='Number of works in the synthetic partition')] = 100000,
+    block_size: Annotated[int, typer.Option(help='Bytes per read in `read_lines`')] = BLOCK_SIZE,
+    repeats: Annotated[int, typer.Option(help='Number of repetitions per backend')] = 3,
+    loglevel: Annotated[str, typer.Option(help='Log level')] = 'INFO',
+):
+    """Compare line-by-line `gzip.open` against `read_lines` with each available decompression backend."""
+    logging.basicConfig(format='%(asctime)s [%(levelname)s] %(name)s (%(process)d): %(message)s', level=loglevel)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if partition is None:
+            partition = Path(tmp_dir) / 'part_000.gz'
+            logger.info(f'Writing synthetic partition with {n_works:,} works to {partition}')
+            write_synthetic_partition(partition, n_works)
+        logger.info(f'Reading {partition} ({partition.stat().st_size / 1024 / 1024:,.1f}MB compressed)')
+
+        def baseline() -> int:
+            with gzip.open(partition, 'rb') as f_in:
+                return sum(1 for line in f_in if line.strip())
+
+        variants = [('gzip.open', baseline)] + [
+            (f'read_lines[{backend.value}]', lambda backend=backend: sum(1 for _ in read_lines(partition, backend=backend, block_size=block_size)))
+            for backend in available_backends()
+        ]
+
+        n_lines: int | None = None
+        for name, func in variants:
+            times = []
+            for _ in range(repeats):
+                start = perf_counter()
+                n_lines_ = func()
+                times.append(perf_counter() - start)
+                if n_lines is not None and n_lines_ != n_lines:
+                    logger.warning(f'{name} read {n_lines_:,} lines instead of {n_lines:,}')
+                n_lines = n_lines_
+            logger.info(f'  {name:>22}: median {median(times):.3f}s, min {min(times):.3f}s, max {max(times):.3f}s ({n_lines:,} lines)')
+
+
+if __name__ == '__main__':
+    typer.run(main)
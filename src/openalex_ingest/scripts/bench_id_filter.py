@@ -0,0 +1,61 @@
+import logging
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Annotated
+
+import typer
+
+from openalex_ingest.shared.config import load_settings
+from openalex_ingest.shared.solr import ID_CHUNK_SIZE, IdFilter, check_openalex_ids, get_solr_client, random_sample
+
+logger = logging.getLogger('bench-id-filter')
+
+
+def main(
+    config: Annotated[Path, typer.Option(help='Path to config file (point it to a local solr instance)')],
+    n_ids: Annotated[int, typer.Option(help='Number of IDs per membership check')] = 5000,
+    repeats: Annotated[int, typer.Option(help='Number of repetitions (each with a fresh random sample to avoid filter cache hits)')] = 5,
+    check_abstract: Annotated[bool, typer.Option(help='Also filter for missing abstracts (as `queue-ids` and `retain-old` do)')] = True,
+    loglevel: Annotated[str, typer.Option(help='Log level')] = 'INFO',
+):
+    """Compare `id:(A OR B ...)` against `{!terms f=id}` filters for ID-membership checks in `check_openalex_ids`."""
+    logging.basicConfig(format='%(asctime)s [%(levelname)s] %(name)s (%(process)d): %(message)s', level=loglevel)
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    logging.getLogger('httpcore').setLevel(logging.WARNING)
+    config_ = load_settings(config).OPENALEX
+    client = get_solr_client(config_)
+
+    variants = [
+        (IdFilter.boolean, ID_CHUNK_SIZE[IdFilter.boolean]),
+        (IdFilter.terms, ID_CHUNK_SIZE[IdFilter.boolean]),
+        (IdFilter.terms, n_ids),
+    ]
+    timings: dict[tuple[IdFilter, int], list[float]] = {variant: [] for variant in variants}
+
+    for repeat in range(repeats):
+        ids = [doc['id'] for doc in random_sample(config_, include_xpac=True, seed=f'bench{repeat}', sample_size=n_ids, client=client)]
+        # Half of the IDs should not exist, as is typical for snapshot partitions during `retain-old`
+        ids = ids[: n_ids // 2] + [f'W{i}X' for i in range(n_ids - n_ids // 2)]
+
+        found: set[str] | None = None
+        # rotate order of variants so neither profits systematically from warm caches
+        for id_filter, chunk_size in variants[repeat % len(variants) :] + variants[: repeat % len(variants)]:
+            start = perf_counter()
+            docs = check_openalex_ids(
+                config_, ids, check_abstract=check_abstract, return_fields='id', client=client, id_filter=id_filter, chunk_size=chunk_size
+            )
+            timings[(id_filter, chunk_size)].append(perf_counter() - start)
+
+            found_ = {doc['id'] for doc in docs}
+            if found is not None and found_ != found:
+                logger.warning(f'Results differ for {id_filter.value} filter with chunks of {chunk_size:,} ({len(found_):,} vs {len(found):,} IDs)')
+            found = found_
+
+    logger.info(f'Checked {n_ids:,} IDs {repeats} times:')
+    for (id_filter, chunk_size), times in timings.items():
+        logger.info(f'  {id_filter.value:>8} filter, chunks of {chunk_size:>6,} IDs: median {median(times):.3f}s, min {min(times):.3f}s, max {max(times):.3f}s')
+
+
+if __name__ == '__main__':
+    typer.run(main)
@@ -0,0 +1,169 @@
+import logging
+from pathlib import Path
+from statistics import median
+from typing import Annotated, Any
+
+import typer
+from sqlalchemy import Connection, text
+
+from openalex_ingest.shared.crud import QUEUE_REQUESTS_SELECT
+from openalex_ingest.shared.util import prepare_runner
+
+logger = logging.getLogger('bench-queue-query')
+
+SCHEMA = 'bench_queue'
+
+# The previous version of `QUEUE_REQUESTS_SELECT` for comparison: one join with an `OR` over all identifiers
+OR_JOIN_SELECT = """
+    SELECT q.sources[0] ->> 0                                                            AS source,
+           q.sources[0] ->> 1                                                            AS priority,
+           count(1) FILTER ( WHERE r.record_id IS NOT NULL)                              AS num_has_request,
+           count(1) FILTER ( WHERE r.abstract IS NOT NULL)                               AS num_has_abstract,
+           count(1) FILTER ( WHERE r.title IS NOT NULL)                                  AS num_has_title,
+           count(1) FILTER ( WHERE r.raw IS NOT NULL)                                    AS num_has_raw,
+           count(1) FILTER ( WHERE r.record_id IS NOT NULL AND r.wrapper = :source) AS num_has_source_request,
+           count(1) FILTER ( WHERE r.abstract IS NOT NULL AND r.wrapper = :source)  AS num_has_source_abstract,
+           count(1) FILTER ( WHERE r.title IS NOT NULL AND r.wrapper = :source)     AS num_has_source_title,
+           count(1) FILTER ( WHERE r.raw IS NOT NULL AND r.wrapper = :source)       AS num_has_source_raw,
+           q.queue_id,
+           q.doi,
+           q.openalex_id,
+           q.pubmed_id,
+           q.s2_id,
+           q.scopus_id,
+           q.wos_id,
+           q.dimensions_id,
+           q.nacsos_id,
+           q.sources,
+           q.on_conflict,
+           q.time_created
+    FROM queued q
+         LEFT OUTER JOIN request r ON
+        (q.doi IS NOT NULL AND q.doi = r.doi)
+            OR (q.openalex_id IS NOT NULL AND q.openalex_id = r.openalex_id)
+            OR (q.pubmed_id IS NOT NULL AND q.pubmed_id = r.pubmed_id)
+            OR (q.s2_id IS NOT NULL AND q.s2_id = r.s2_id)
+            OR (q.scopus_id IS NOT NULL AND q.scopus_id = r.scopus_id)
+            OR (q.wos_id IS NOT NULL AND q.wos_id = r.wos_id)
+            OR (q.dimensions_id IS NOT NULL AND q.dimensions_id = r.dimensions_id)
+            OR (q.nacsos_id IS NOT NULL AND q.nacsos_id = r.nacsos_id)
+    GROUP BY source, priority, q.queue_id, q.doi, q.openalex_id, q.pubmed_id, q.s2_id, q.scopus_id, q.wos_id,
+             q.dimensions_id, q.nacsos_id, q.sources, q.on_conflict, q.time_created
+"""
+
+# Same as in `get_queued_requested_for_source`
+QUEUED = """
+    WITH
+        queued AS (
+            SELECT *
+            FROM queue
+            WHERE next_source = :source
+            ORDER BY time_created DESC
+            LIMIT :limit)
+"""
+
+SOURCES = ['DIMENSIONS', 'SCOPUS', 'PUBMED', 'WOS']
+
+
+def generate(connection: Connection, n_requests: int, n_queued: int) -> None:
+    """Copies of `request` and `queue` (with all their indices) in a separate schema, filled with synthetic entries.
+    About a third of the queued entries have earlier requests, matching on DOI, OpenAlex ID, or PubMed ID.
+    """
+    logger.info(f'Generating {n_requests:,} requests and {n_queued:,} queue entries in schema "{SCHEMA}"')
+    connection.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA};'))
+    connection.execute(text(f'CREATE TABLE {SCHEMA}.request (LIKE public.request INCLUDING ALL);'))
+    connection.execute(text(f'CREATE TABLE {SCHEMA}.queue (LIKE public.queue INCLUDING ALL);'))
+    connection.execute(
+        text(
+            f"""
+            INSERT INTO {SCHEMA}.request (record_id, wrapper, openalex_id, doi, pubmed_id, scopus_id, dimensions_id, title, abstract, time_created)
+            SELECT gen_random_uuid(),
+                   (ARRAY ['DIMENSIONS', 'SCOPUS', 'PUBMED', 'WOS'])[1 + i % 4],
+                   CASE WHEN i % 5 <> 0 THEN 'W' || i END,
+                   CASE WHEN i % 3 <> 0 THEN '10.1234/' || i END,
+                   CASE WHEN i % 4 = 2 THEN i::text END,
+                   CASE WHEN i % 4 = 1 THEN '2-s2.0-' || i END,
+                   CASE WHEN i % 4 = 0 THEN 'pub.' || i END,
+                   'Title ' || i,
+                   CASE WHEN i % 2 = 0 THEN 'Abstract ' || i END,
+                   now()
+            FROM generate_series(1, :n_requests) i;
+            """,
+        ),
+        parameters={'n_requests': n_requests},
+    )
+    connection.execute(
+        text(
+            f"""
+            INSERT INTO {SCHEMA}.queue (queue_id, doi, openalex_id, pubmed_id, sources, on_conflict, time_created)
+            SELECT i,
+                   '10.1234/' || (i * 3 + i % 3),
+                   'W' || (i * 3 + 1),
+                   CASE WHEN i % 2 = 0 THEN (i * 3 + 2)::text END,
+                   jsonb_build_array(jsonb_build_array((ARRAY ['DIMENSIONS', 'SCOPUS', 'PUBMED', 'WOS'])[1 + i % 4], 2)),
+                   'DO_NOTHING',
+                   now() - make_interval(secs => i)
+            FROM generate_series(1, :n_queued) i;
+            """,
+        ),
+        parameters={'n_queued': n_queued},
+    )
+    connection.execute(text(f'ANALYZE {SCHEMA}.request; ANALYZE {SCHEMA}.queue;'))
+    connection.commit()
+
+
+def scans(plan: dict[str, Any], relation: str = 'request') -> set[str]:
+    """Node types used to read `relation` anywhere in an `EXPLAIN (FORMAT JSON)` plan."""
+    found = {plan['Node Type']} if plan.get('Relation Name') == relation else set()
+    for child in plan.get('Plans', []):
+        found |= scans(child, relation)
+    return found
+
+
+def main(
+    config: Annotated[Path, typer.Option(help='Path to config file (point it to a scratch database, the benchmark creates its own schema)')],
+    n_requests: Annotated[int, typer.Option(help='Number of generated request rows')] = 5_000_000,
+    n_queued: Annotated[int, typer.Option(help='Number of generated queue entries')] = 500_000,
+    batch_size: Annotated[int, typer.Option(help='Number of queue entries per query (as --batch-size of queue-worker)')] = 25,
+    repeats: Annotated[int, typer.Option(help='Number of repetitions per source and variant')] = 5,
+    reuse: Annotated[bool, typer.Option(help='Reuse the dataset from a previous run instead of generating it again')] = False,
+    keep: Annotated[bool, typer.Option(help='Keep the generated schema after the benchmark')] = False,
+    loglevel: Annotated[str, typer.Option(help='Log level')] = 'INFO',
+):
+    """Compare the per-identifier `UNION` lookup in `get_queued_requested_for_source` against the previous `OR` join via `EXPLAIN ANALYZE`."""
+    _, _, db_engine = prepare_runner(config=config, loglevel=loglevel, logger_name='bench-queue-query', run_log_init=True)
+    variants = {'or-join': QUEUED + OR_JOIN_SELECT, 'union': QUEUED + QUEUE_REQUESTS_SELECT}
+
+    with db_engine.engine.connect() as connection:
+        if not reuse:
+            generate(connection, n_requests=n_requests, n_queued=n_queued)
+        connection.execute(text(f'SET search_path TO {SCHEMA}, public;'))
+
+        results = {
+            name: [sorted(map(tuple, connection.execute(text(sql), parameters={'source': source, 'limit': batch_size}).all())) for source in SOURCES]
+            for name, sql in variants.items()
+        }
+        if results['or-join'] != results['union']:
+            logger.error('The variants return different results!')
+
+        for name, sql in variants.items():
+            timings = []
+            nodes: set[str] = set()
+            for _ in range(repeats):
+                for source in SOURCES:
+                    explain = connection.execute(text(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}'), parameters={'source': source, 'limit': batch_size})
+                    plan = explain.scalar_one()[0]
+                    timings.append(plan['Execution Time'])
+                    nodes |= scans(plan['Plan'])
+            logger.info(
+                f'{name:>8}: median {median(timings):,.1f}ms, max {max(timings):,.1f}ms per query, request read via {", ".join(sorted(nodes))}'
+                + (' (full table scan!)' if 'Seq Scan' in nodes else '')
+            )
+
+        if not keep:
+            connection.execute(text(f'DROP SCHEMA {SCHEMA} CASCADE;'))
+            connection.commit()
+
+
+if __name__ == '__main__':
+    typer.run(main)
@@ -0,0 +1,30 @@
+"""revision
+
+Revision ID: b4c1e9d27a30
+Revises: 7e92682ac511
+Create Date: 2026-10-17 09:12:41.518204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4c1e9d27a30'
+down_revision: Union[str, Sequence[str], None] = '7e92682ac511'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('queue', sa.Column('leased_by', sa.String(), nullable=True))
+    op.add_column('queue', sa.Column('leased_until', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('queue', 'leased_until')
+    op.drop_column('queue', 'leased_by')
@@ -0,0 +1,31 @@
+"""revision
+
+Revision ID: c7f3a0d5e912
+Revises: b4c1e9d27a30
+Create Date: 2026-10-17 10:04:17.230871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7f3a0d5e912'
+down_revision: Union[str, Sequence[str], None] = 'b4c1e9d27a30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored generated column, so existing rows are filled in when the table is rewritten
+    op.add_column('queue', sa.Column('next_source', sa.String(), sa.Computed('sources -> 0 ->> 0', persisted=True), nullable=True))
+    op.create_index('ix_queue_next_source', 'queue', ['next_source', 'time_created'], unique=False, postgresql_where=sa.text('next_source IS NOT NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_queue_next_source', table_name='queue', postgresql_where=sa.text('next_source IS NOT NULL'))
+    op.drop_column('queue', 'next_source')
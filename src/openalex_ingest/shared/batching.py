@@ -0,0 +1,68 @@
+import logging
+from itertools import islice
+from typing import Generator, Iterable, TypeVar
+
+import httpx
+
+logger = logging.getLogger('openalex.shared.batching')
+
+T = TypeVar('T')
+
+
+def is_overload(e: BaseException) -> bool:
+    """Whether an error from solr suggests the request was too large or solr too busy (as opposed to e.g. a bad document)."""
+    if isinstance(e, httpx.TimeoutException):
+        return True
+    return isinstance(e, httpx.HTTPStatusError) and (e.response.status_code >= 500 or e.response.status_code == 413)
+
+
+class AdaptiveBatchSize:
+    """Controller for the number of documents per solr update.
+
+    The batch size grows by `growth` as long as updates take less than `target_latency` seconds, shrinks
+    proportionally when they take much longer, and is halved whenever solr times out or fails with a 5xx.
+    It always stays between `minimum` and `maximum` (by default 1/16 and 16 times the `initial` size).
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        target_latency: float = 5.0,
+        minimum: int | None = None,
+        maximum: int | None = None,
+        growth: float = 1.25,
+        name: str = 'solr',
+    ):
+        self.size = initial
+        self.target_latency = target_latency
+        self.minimum = minimum or max(1, initial // 16)
+        self.maximum = maximum or initial * 16
+        self.growth = growth
+        self.name = name
+
+    def _resize(self, size: int, reason: str) -> None:
+        size = min(self.maximum, max(self.minimum, size))
+        if size != self.size:
+            logger.info(f'{self.name}: batch size {self.size:,} -> {size:,} ({reason})')
+            self.size = size
+
+    def success(self, n_docs: int, latency: float) -> None:
+        """Record a successful update of `n_docs` documents that took `latency` seconds."""
+        if n_docs <= 0:
+            return
+        # scale to a full batch, so small trailing batches count the same
+        expected = latency * self.size / n_docs
+        if expected < self.target_latency:
+            self._resize(max(self.size + 1, int(self.size * self.growth)), f'{latency:.1f}s for {n_docs:,} documents')
+        elif expected > self.target_latency * 1.5:
+            self._resize(int(self.size * max(0.5, self.target_latency / expected)), f'{latency:.1f}s for {n_docs:,} documents')
+
+    def failure(self, reason: str) -> None:
+        """Record a timeout or server error."""
+        self._resize(self.size // 2, reason)
+
+    def batched(self, items: Iterable[T]) -> Generator[list[T], None, None]:
+        """Like `itertools.batched`, but every batch is as large as the current batch size."""
+        it = iter(items)
+        while batch := list(islice(it, self.size)):
+            yield batch
@@ -41,7 +41,7 @@ def read_complete_records(
 
 def queue_requests(db_engine: DatabaseEngine, entries: list[Queue]):
     with db_engine.engine.connect() as connection:
-        connection.execute(insert(Queue), [entry.model_dump(exclude={'queue_id'}) for entry in entries])
+        connection.execute(insert(Queue), [entry.model_dump(exclude={'queue_id', 'next_source'}) for entry in entries])
         connection.commit()
 
 
@@ -85,8 +85,7 @@ def get_queued_for_source(
                            on_conflict,
                            time_created
                     FROM queue
-                    WHERE sources IS NOT NULL
-                      AND sources[0] ->> 0 = :source
+                    WHERE next_source = :source
                     ORDER BY time_created
                     LIMIT :limit;
                     """,
@@ -98,6 +97,67 @@ def get_queued_for_source(
         )
 
 
+# Continues a `WITH queued AS (...)` clause: selects the queued entries together with counts of matching entries in the request table.
+# Matches are looked up per identifier, so each branch can use the index on that column of `request`; an `OR` over all
+# identifiers in a single join condition forces postgres to scan `request`. `UNION` (rather than `UNION ALL`) drops
+# duplicates of requests that match an entry on several identifiers, so they are counted once.
+QUEUE_REQUESTS_SELECT = """
+        ,
+        matches AS (
+            SELECT q.queue_id, r.record_id FROM queued q JOIN request r ON r.doi = q.doi
+            UNION
+            SELECT q.queue_id, r.record_id FROM queued q JOIN request r ON r.openalex_id = q.openalex_id
+            UNION
+            SELECT q.queue_id, r.record_id FROM queued q JOIN request r ON r.pubmed_id = q.pubmed_id
+            UNION
+            SELECT q.queue_id, r.record_id FROM queued q JOIN request r ON r.s2_id = q.s2_id
+            UNION
+            SELECT q.queue_id, r.record_id FROM queued q JOIN request r ON r.scopus_id = q.scopus_id
+            UNION
+            SELECT q.queue_id, r.record_id FROM queued q JOIN request r ON r.wos_id = q.wos_id
+            UNION
+            SELECT q.queue_id, r.record_id FROM queued q JOIN request r ON r.dimensions_id = q.dimensions_id
+            UNION
+            SELECT q.queue_id, r.record_id FROM queued q JOIN request r ON r.nacsos_id = q.nacsos_id)
+    SELECT q.next_source                                                                 AS source,
+           q.sources[0] ->> 1                                                            AS priority,
+           count(1) FILTER ( WHERE r.record_id IS NOT NULL)                              AS num_has_request,
+           count(1) FILTER ( WHERE r.abstract IS NOT NULL)                               AS num_has_abstract,
+           count(1) FILTER ( WHERE r.title IS NOT NULL)                                  AS num_has_title,
+           count(1) FILTER ( WHERE r.raw IS NOT NULL)                                    AS num_has_raw,
+           count(1) FILTER ( WHERE r.record_id IS NOT NULL AND r.wrapper = :source) AS num_has_source_request,
+           count(1) FILTER ( WHERE r.abstract IS NOT NULL AND r.wrapper = :source)  AS num_has_source_abstract,
+           count(1) FILTER ( WHERE r.title IS NOT NULL AND r.wrapper = :source)     AS num_has_source_title,
+           count(1) FILTER ( WHERE r.raw IS NOT NULL AND r.wrapper = :source)       AS num_has_source_raw,
+           q.queue_id,
+           q.doi,
+           q.openalex_id,
+           q.pubmed_id,
+           q.s2_id,
+           q.scopus_id,
+           q.wos_id,
+           q.dimensions_id,
+           q.nacsos_id,
+           q.sources,
+           q.on_conflict,
+           q.time_created
+    FROM queued q
+         LEFT OUTER JOIN matches m ON m.queue_id = q.queue_id
+         LEFT OUTER JOIN request r ON r.record_id = m.record_id
+    GROUP BY source, priority, q.queue_id, q.doi, q.openalex_id, q.pubmed_id, q.s2_id, q.scopus_id, q.wos_id,
+             q.dimensions_id, q.nacsos_id, q.sources, q.on_conflict, q.time_created
+"""
+
+
+def _creation_filter(created_before: datetime | None, created_after: datetime | None) -> str:
+    creation_filter = ''
+    if created_before is not None:
+        creation_filter += ' AND time_created <= :created_before'
+    if created_after is not None:
+        creation_filter += ' AND time_created >= :created_after'
+    return creation_filter
+
+
 def get_queued_requested_for_source(
     db_engine: DatabaseEngine,
     source: str,  # APIEnum,
@@ -108,11 +168,6 @@ def get_queued_requested_for_source(
 ) -> Generator[QueueRequests, None, None]:
     """Return the oldest `limit` queued entries for `source` (same as get_queued_for_source, but including counts for matching entries in the request table)."""
     with db_engine.engine.connect() as connection:
-        creation_filter = ''
-        if created_before is not None:
-            creation_filter += ' AND time_created <= :created_before'
-        if created_after is not None:
-            creation_filter += ' AND time_created >= :created_after'
         yield from (
             QueueRequests(**row)
             for row in (
@@ -123,44 +178,10 @@ def get_queued_requested_for_source(
                             queued AS (
                                 SELECT *
                                 FROM queue
-                                WHERE sources IS NOT NULL
-                                  AND sources[0] ->> 0 = :source {creation_filter}
+                                WHERE next_source = :source {_creation_filter(created_before, created_after)}
                                 ORDER BY time_created {'ASC' if oldest_first else 'DESC'}
                                 LIMIT :limit)
-                        SELECT q.sources[0] ->> 0                                                            AS source,
-                               q.sources[0] ->> 1                                                            AS priority,
-                               count(1) FILTER ( WHERE r.record_id IS NOT NULL)                              AS num_has_request,
-                               count(1) FILTER ( WHERE r.abstract IS NOT NULL)                               AS num_has_abstract,
-                               count(1) FILTER ( WHERE r.title IS NOT NULL)                                  AS num_has_title,
-                               count(1) FILTER ( WHERE r.raw IS NOT NULL)                                    AS num_has_raw,
-                               count(1) FILTER ( WHERE r.record_id IS NOT NULL AND r.wrapper = :source) AS num_has_source_request,
-                               count(1) FILTER ( WHERE r.abstract IS NOT NULL AND r.wrapper = :source)  AS num_has_source_abstract,
-                               count(1) FILTER ( WHERE r.title IS NOT NULL AND r.wrapper = :source)     AS num_has_source_title,
-                               count(1) FILTER ( WHERE r.raw IS NOT NULL AND r.wrapper = :source)       AS num_has_source_raw,
-                               q.queue_id,
-                               q.doi,
-                               q.openalex_id,
-                               q.pubmed_id,
-                               q.s2_id,
-                               q.scopus_id,
-                               q.wos_id,
-                               q.dimensions_id,
-                               q.nacsos_id,
-                               q.sources,
-                               q.on_conflict,
-                               q.time_created
-                        FROM queued q
-                             LEFT OUTER JOIN request r ON
-                            (q.doi IS NOT NULL AND q.doi = r.doi)
-                                OR (q.openalex_id IS NOT NULL AND q.openalex_id = r.openalex_id)
-                                OR (q.pubmed_id IS NOT NULL AND q.pubmed_id = r.pubmed_id)
-                                OR (q.s2_id IS NOT NULL AND q.s2_id = r.s2_id)
-                                OR (q.scopus_id IS NOT NULL AND q.scopus_id = r.scopus_id)
-                                OR (q.wos_id IS NOT NULL AND q.wos_id = r.wos_id)
-                                OR (q.dimensions_id IS NOT NULL AND q.dimensions_id = r.dimensions_id)
-                                OR (q.nacsos_id IS NOT NULL AND q.nacsos_id = r.nacsos_id)
-                        GROUP BY source, priority, q.queue_id, q.doi, q.openalex_id, q.pubmed_id, q.s2_id, q.scopus_id, q.wos_id,
-                                 q.dimensions_id, q.nacsos_id, q.sources, q.on_conflict, q.time_created;
+                        {QUEUE_REQUESTS_SELECT};
                         """,
                     ),
                     parameters={'limit': limit, 'source': source, 'created_before': created_before, 'created_after': created_after},
@@ -171,6 +192,104 @@ def get_queued_requested_for_source(
         )
 
 
+def claim_queued_for_source(
+    db_engine: DatabaseEngine,
+    source: str,  # APIEnum,
+    worker_id: str,
+    limit: int = 25,
+    lease_seconds: int = 600,
+    oldest_first: bool = True,
+    created_before: datetime | None = None,
+    created_after: datetime | None = None,
+) -> list[QueueRequests]:
+    """Same as `get_queued_requested_for_source`, but atomically leases the returned entries to `worker_id`.
+
+    Rows that are locked by a concurrent claim are skipped (`FOR UPDATE SKIP LOCKED`) and entries leased to
+    another worker are ignored until their lease expires, so several workers never work on the same entry.
+    Leases of workers that crashed simply run out after `lease_seconds`; release them earlier with `release_queued`.
+    """
+    with db_engine.engine.connect() as connection:
+        rows = (
+            connection.execute(
+                text(
+                    f"""
+                    WITH
+                        claimable AS (
+                            SELECT queue_id
+                            FROM queue
+                            WHERE next_source = :source {_creation_filter(created_before, created_after)}
+                              AND (leased_until IS NULL OR leased_until < now())
+                            ORDER BY time_created {'ASC' if oldest_first else 'DESC'}
+                            LIMIT :limit
+                            FOR UPDATE SKIP LOCKED),
+                        queued AS (
+                            UPDATE queue
+                            SET leased_by    = :worker_id,
+                                leased_until = now() + make_interval(secs => :lease_seconds)
+                            FROM claimable
+                            WHERE queue.queue_id = claimable.queue_id
+                            RETURNING queue.*)
+                    {QUEUE_REQUESTS_SELECT}
+                    ORDER BY q.time_created {'ASC' if oldest_first else 'DESC'};
+                    """,
+                ),
+                parameters={
+                    'limit': limit,
+                    'source': source,
+                    'worker_id': worker_id,
+                    'lease_seconds': lease_seconds,
+                    'created_before': created_before,
+                    'created_after': created_after,
+                },
+            )
+            .mappings()
+            .all()
+        )
+        connection.commit()
+    return [QueueRequests(**row) for row in rows]
+
+
+def release_queued(
+    db_engine: DatabaseEngine,
+    worker_id: str,
+    queue_ids: list[int],
+) -> None:
+    """Give up the leases `worker_id` holds on `queue_ids`, so other workers can claim them for their next source right away."""
+    with db_engine.engine.connect() as connection:
+        connection.execute(
+            text(
+                """UPDATE queue
+                   SET leased_by    = NULL,
+                       leased_until = NULL
+                   WHERE leased_by = :worker_id
+                     AND queue_id = ANY (:ids);""",
+            ),
+            parameters={'worker_id': worker_id, 'ids': queue_ids},
+        )
+        connection.commit()
+
+
+def renew_leases(
+    db_engine: DatabaseEngine,
+    worker_id: str,
+    queue_ids: list[int],
+    lease_seconds: int = 600,
+) -> int:
+    """Extend the leases `worker_id` still holds on `queue_ids` to `lease_seconds` from now; returns how many were renewed."""
+    with db_engine.engine.connect() as connection:
+        result = connection.execute(
+            text(
+                """UPDATE queue
+                   SET leased_until = now() + make_interval(secs => :lease_seconds)
+                   WHERE leased_by = :worker_id
+                     AND queue_id = ANY (:ids);""",
+            ),
+            parameters={'worker_id': worker_id, 'ids': queue_ids, 'lease_seconds': lease_seconds},
+        )
+        connection.commit()
+    return result.rowcount
+
+
 def drop_source_from_queued(
     db_engine: DatabaseEngine,
     source: str,  # APIEnum,
@@ -207,12 +326,70 @@ def drop_unforced_sources_from_queued(
         connection.commit()
 
 
+def transition_queued(
+    db_engine: DatabaseEngine,
+    source: str,  # APIEnum,
+    queue_ids: list[int],
+    found_ids: list[int],
+) -> tuple[int, int]:
+    """Move the entries of a worker batch for `source` on to their next state in one transaction.
+
+    Entries in `found_ids` (an abstract was found) keep only their forced sources (see `drop_unforced_sources_from_queued`),
+    all other `queue_ids` only lose `source` (see `drop_source_from_queued`). Entries without sources left are deleted right away,
+    the others are updated and their lease is released. Unlike `drop_finished_from_queue`, this only touches the batch.
+    Returns the number of updated and deleted entries.
+    """
+    with db_engine.engine.connect() as connection:
+        n_updated, n_finished = connection.execute(
+            text(
+                """
+                WITH
+                    transition AS (
+                        SELECT queue_id,
+                               CASE
+                                   WHEN queue_id = ANY (:found_ids)
+                                       THEN jsonb_path_query_array(sources, ('$ ? (@[1] == 1 )')::jsonpath)  -- SourcePriority.FORCE = 1
+                                   ELSE jsonb_path_query_array(sources, ('$ ? (@[0] != "' || :source || '")')::jsonpath)
+                                   END AS sources
+                        FROM queue
+                        WHERE sources IS NOT NULL
+                          AND queue_id = ANY (:ids)
+                        FOR UPDATE),
+                    finished AS (
+                        DELETE FROM queue
+                        USING transition
+                        WHERE queue.queue_id = transition.queue_id
+                          AND transition.sources = '[]'::jsonb
+                        RETURNING queue.queue_id),
+                    updated AS (
+                        UPDATE queue
+                        SET sources      = transition.sources,
+                            leased_by    = NULL,
+                            leased_until = NULL
+                        FROM transition
+                        WHERE queue.queue_id = transition.queue_id
+                          AND transition.sources <> '[]'::jsonb
+                        RETURNING queue.queue_id)
+                SELECT (SELECT count(1) FROM updated), (SELECT count(1) FROM finished);
+                """,
+            ),
+            parameters={'source': source, 'ids': queue_ids, 'found_ids': found_ids},
+        ).one()
+        connection.commit()
+    return n_updated, n_finished
+
+
 def drop_finished_from_queue(
     db_engine: DatabaseEngine,
-) -> None:
+) -> int:
+    """Delete all entries without sources left; returns how many were deleted.
+    `transition_queued` deletes finished entries of its batch itself, this catches those left behind by anything else
+    (e.g. older workers or manual edits), which no worker would ever claim again as they have no `next_source`.
+    """
     with db_engine.engine.connect() as connection:
-        connection.execute(text("DELETE FROM queue WHERE sources = '[]'::jsonb;"))
+        result = connection.execute(text("DELETE FROM queue WHERE sources = '[]'::jsonb;"))
         connection.commit()
+    return result.rowcount
 
 
 def drop_queued(
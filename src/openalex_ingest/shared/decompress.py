@@ -0,0 +1,122 @@
+import gzip
+import shutil
+import logging
+import subprocess
+from contextlib import contextmanager
+from enum import Enum
+from pathlib import Path
+from typing import IO, Generator
+
+logger = logging.getLogger('openalex.shared.decompress')
+
+BLOCK_SIZE = 16 * 1024 * 1024
+
+
+class GzipBackend(str, Enum):
+    auto = 'auto'  # first available of isal, zlib_ng, pigz, stdlib
+    isal = 'isal'  # python-isal (`isal` package), decompresses in a separate thread
+    zlib_ng = 'zlib_ng'  # python-zlib-ng (`zlib-ng` package), decompresses in a separate thread
+    pigz = 'pigz'  # `pigz -dc` (or `gzip -dc`) subprocess, decompresses on another core
+    stdlib = 'stdlib'  # python's `gzip` module
+
+
+def available_backends() -> list[GzipBackend]:
+    backends = []
+    try:
+        import isal  # noqa: F401
+
+        backends.append(GzipBackend.isal)
+    except ImportError:
+        pass
+    try:
+        import zlib_ng  # noqa: F401
+
+        backends.append(GzipBackend.zlib_ng)
+    except ImportError:
+        pass
+    if shutil.which('pigz') is not None:
+        backends.append(GzipBackend.pigz)
+    backends.append(GzipBackend.stdlib)
+    return backends
+
+
+def resolve_backend(backend: GzipBackend = GzipBackend.auto) -> GzipBackend:
+    if backend == GzipBackend.auto:
+        return available_backends()[0]
+    if backend == GzipBackend.pigz or backend in available_backends():
+        return backend
+    logger.warning(f'Gzip backend "{backend.value}" is not available, falling back to stdlib.')
+    return GzipBackend.stdlib
+
+
+@contextmanager
+def open_gzip(path: Path | str, backend: GzipBackend = GzipBackend.auto) -> Generator[IO[bytes], None, None]:
+    """Open a gzipped file for binary reading with the fastest (or given) available decompression backend."""
+    backend = resolve_backend(backend)
+    if backend == GzipBackend.isal:
+        from isal import igzip_threaded
+
+        with igzip_threaded.open(path, 'rb', threads=1) as f_in:
+            yield f_in
+    elif backend == GzipBackend.zlib_ng:
+        from zlib_ng import gzip_ng_threaded
+
+        with gzip_ng_threaded.open(path, 'rb', threads=1) as f_in:
+            yield f_in
+    elif backend == GzipBackend.pigz:
+        command = [shutil.which('pigz') or 'gzip', '-dc', str(path)]
+        with subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=BLOCK_SIZE) as proc:
+            assert proc.stdout is not None
+            try:
+                yield proc.stdout
+            except BaseException:
+                proc.kill()
+                raise
+            # if reading stopped early, closing the pipe ends the process with SIGPIPE (returncode < 0)
+            proc.stdout.close()
+            proc.wait()
+        if proc.returncode > 0:
+            raise OSError(f'`{" ".join(command)}` failed with exit code {proc.returncode}')
+    else:
+        with gzip.open(path, 'rb') as f_in:
+            yield f_in
+
+
+def iter_blocks(f_in: IO[bytes], block_size: int = BLOCK_SIZE, n_lines: int | None = None) -> Generator[list[bytes], None, None]:
+    """Read an uncompressed stream in large blocks and yield the complete (non-empty) lines in each block, without trailing newline.
+    With `n_lines`, stop after that many lines (counting empty ones).
+    """
+    remainder = b''
+    while n_lines is None or n_lines > 0:
+        block = f_in.read(block_size)
+        if not block:
+            if remainder:
+                yield [remainder]
+            return
+        lines = (remainder + block).split(b'\n')
+        remainder = lines.pop()
+        if n_lines is not None:
+            lines = lines[:n_lines]
+            n_lines -= len(lines)
+        yield [line for line in lines if line]
+
+
+def skip_bytes(f_in: IO[bytes], n_bytes: int, block_size: int = BLOCK_SIZE) -> None:
+    """Forward a (not necessarily seekable) stream by `n_bytes` by reading and discarding them."""
+    while n_bytes > 0:
+        block = f_in.read(min(block_size, n_bytes))
+        if not block:
+            raise EOFError(f'Stream ended {n_bytes:,} bytes before the requested offset')
+        n_bytes -= len(block)
+
+
+def read_blocks(path: Path | str, backend: GzipBackend = GzipBackend.auto, block_size: int = BLOCK_SIZE) -> Generator[list[bytes], None, None]:
+    """Read a gzipped JSONL file in large blocks (see `iter_blocks`)."""
+    with open_gzip(path, backend=backend) as f_in:
+        yield from iter_blocks(f_in, block_size=block_size)
+
+
+def read_lines(path: Path | str, backend: GzipBackend = GzipBackend.auto, block_size: int = BLOCK_SIZE) -> Generator[bytes, None, None]:
+    """Same as `read_blocks`, but line by line."""
+    for lines in read_blocks(path, backend=backend, block_size=block_size):
+        yield from lines
@@ -0,0 +1,119 @@
+import queue
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Generator, Iterable, Iterator
+
+logger = logging.getLogger('openalex.shared.pipeline')
+
+Stage = Callable[[Iterator[Any]], Iterable[Any]]
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def _put(q: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(q: queue.Queue, stop: threading.Event) -> Generator[Any, None, None]:
+    while not stop.is_set():
+        try:
+            item = q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if item is _END:
+            return
+        if isinstance(item, _Failure):
+            raise item.exc
+        yield item
+
+
+def _run_stage(stage: Stage, items: Iterator[Any], q_out: queue.Queue, stop: threading.Event) -> None:
+    try:
+        for out in stage(items):
+            if not _put(q_out, out, stop):
+                return
+        _put(q_out, _END, stop)
+    except BaseException as e:
+        _put(q_out, _Failure(e), stop)
+
+
+def staged(source: Iterable[Any], *stages: Stage, queue_depth: int = 4) -> Generator[Any, None, None]:
+    """Run `source` and each of the `stages` in their own thread, joined by bounded queues.
+
+    Every stage receives an iterator over the outputs of the previous one and yields its own outputs,
+    so stages are free to re-batch. The caller consumes the last stage, which makes it the final stage.
+    Memory is bounded by `queue_depth` items between each pair of stages; exceptions are forwarded
+    downstream and re-raised in the caller, which in turn stops all upstream threads.
+    """
+    stop = threading.Event()
+    threads: list[threading.Thread] = []
+
+    q_out: queue.Queue = queue.Queue(maxsize=queue_depth)
+    threads.append(threading.Thread(target=_run_stage, args=(lambda items: items, iter(source), q_out, stop), daemon=True, name='stage-0'))
+
+    for si, stage in enumerate(stages, 1):
+        q_in = q_out
+        q_out = queue.Queue(maxsize=queue_depth)
+        threads.append(threading.Thread(target=_run_stage, args=(stage, _drain(q_in, stop), q_out, stop), daemon=True, name=f'stage-{si}'))
+
+    for thread in threads:
+        thread.start()
+    try:
+        yield from _drain(q_out, stop)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+async def bounded(
+    items: Iterator[Any],
+    worker: Callable[[Any], Awaitable[Any]],
+    on_done: Callable[[Any, Any], None],
+    max_inflight: int = 4,
+) -> None:
+    """Await `worker(item)` for every item with at most `max_inflight` running at the same time.
+
+    `on_done(item, result)` is called in the order of `items` (not in order of completion), so callers
+    can safely checkpoint progress. `items` is advanced in a thread, so it may block (e.g. the output of `staged`).
+    If a worker raises, all pending workers are cancelled and the exception is re-raised.
+    """
+    semaphore = asyncio.Semaphore(max_inflight)
+    pending: deque[tuple[Any, asyncio.Task]] = deque()
+
+    async def run(item: Any) -> Any:
+        try:
+            return await worker(item)
+        finally:
+            semaphore.release()
+
+    try:
+        while True:
+            await semaphore.acquire()
+            item = await asyncio.to_thread(next, items, _END)
+            if item is _END:
+                semaphore.release()
+                break
+            pending.append((item, asyncio.create_task(run(item))))
+            while len(pending) > 0 and pending[0][1].done():
+                item, task = pending.popleft()
+                on_done(item, task.result())
+        while len(pending) > 0:
+            item, task = pending.popleft()
+            on_done(item, await task)
+    finally:
+        for _, task in pending:
+            task.cancel()
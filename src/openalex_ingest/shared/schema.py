@@ -5,7 +5,7 @@ from datetime import datetime
 
 from pydantic import BaseModel, AfterValidator
 from sqlmodel import Field, SQLModel, Relationship
-from sqlalchemy import DateTime, func, Column
+from sqlalchemy import Computed, DateTime, Index, String, func, Column, text
 from sqlalchemy.ext.mutable import MutableDict
 from nacsos_data.util.academic.apis import APIEnum
 from sqlalchemy import TypeDecorator
@@ -91,6 +91,8 @@ class SourcesJSONB(TypeDecorator):
 
 class Queue(SQLModel, table=True):
     __tablename__ = 'queue'
+    # Picking the oldest/latest entries for a source is a range scan on this index
+    __table_args__ = (Index('ix_queue_next_source', 'next_source', 'time_created', postgresql_where=text('next_source IS NOT NULL')),)
     queue_id: int | None = Field(default=None, primary_key=True)
 
     doi: Annotated[str | None, AfterValidator(strip_url)] = Field(default=None, nullable=True, unique=False, index=False)
@@ -104,6 +106,8 @@ class Queue(SQLModel, table=True):
 
     # sources: list[tuple[APIEnum, SourcePriority]] | None = Field(sa_column=Column(MutableDict.as_mutable(JSONB(none_as_null=True))), default=None)
     sources: list[tuple[APIEnum, SourcePriority]] | None = Field(sa_column=Column(SourcesJSONB(none_as_null=True)), default=None)
+    # The source the entry waits for (first in `sources`), maintained by postgres
+    next_source: str | None = Field(sa_column=Column(String, Computed('sources -> 0 ->> 0', persisted=True), nullable=True), default=None)
     on_conflict: OnConflict = Field(default=OnConflict.DO_NOTHING, nullable=False, unique=False, index=False)
 
     time_created: datetime = Field(
@@ -111,6 +115,10 @@ class Queue(SQLModel, table=True):
         default_factory=datetime.now,
     )
 
+    # Lease of the queue worker currently working on this entry (see `crud.claim_queued_for_source`)
+    leased_by: str | None = Field(default=None, nullable=True, unique=False, index=False)
+    leased_until: datetime | None = Field(sa_column=Column(DateTime(timezone=True), nullable=True, index=False), default=None)
+
 
 class QueueRequests(BaseModel):  # FIXME: class QueueRequests(Queue, table=False) throws type error
     # begin inheritance hack
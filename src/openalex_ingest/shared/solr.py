@@ -1,8 +1,14 @@
+import os
+import gzip
+import zlib
+import asyncio
 import orjson as json
 import logging
 from datetime import datetime
-from typing import Annotated, Generator, Iterator, Any
+from enum import Enum
+from typing import Annotated, AsyncIterator, Generator, Iterable, Iterator, Any
 from itertools import batched
+from time import perf_counter
 
 import httpx
 import typer
@@ -14,13 +20,253 @@ from nacsos_data.util.academic.apis import OpenAlexSolrAPI
 
 from .util import it_limit
 from .schema import Request
+from .pipeline import bounded
+from .batching import AdaptiveBatchSize, is_overload
+from .spool import DeadLetterSpool
 
 logger = logging.getLogger('openalex.shared.solr')
 
 
-def commit(conf: OpenAlexConfig):
+class IdFilter(str, Enum):
+    boolean = 'boolean'  # id:(W1 OR W2 OR ...), limited by solr's `maxBooleanClauses`
+    terms = 'terms'  # {!terms f=id}W1,W2,...
+
+
+# Maximum number of IDs per request before lists are split up
+ID_CHUNK_SIZE = {
+    IdFilter.boolean: 1000,
+    IdFilter.terms: 10000,
+}
+
+
+def ids_query(ids: list[str], id_filter: IdFilter = IdFilter.terms) -> str:
+    if id_filter == IdFilter.terms:
+        return f'{{!terms f=id}}{",".join(ids)}'
+    return f'id:({" OR ".join(ids)})'
+
+
+# Bytes per chunk when streaming a `JsonBody`
+STREAM_CHUNK_SIZE = 256 * 1024
+
+
+class JsonBody:
+    """Request body made of pre-serialised JSON documents (e.g. from `orjson.dumps`), newline-delimited or as a JSON array.
+
+    The documents are streamed in chunks of about `chunk_size` bytes instead of being joined into one large
+    bytes (or str) object first. The body can be iterated repeatedly, so retries can send it again.
+    """
+
+    def __init__(self, docs: list[bytes], separator: bytes = b'\n', prefix: bytes = b'', suffix: bytes = b'', chunk_size: int = STREAM_CHUNK_SIZE):
+        self.docs = docs
+        self.separator = separator
+        self.prefix = prefix
+        self.suffix = suffix
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def array(cls, docs: list[bytes], chunk_size: int = STREAM_CHUNK_SIZE) -> 'JsonBody':
+        return cls(docs, separator=b',\n', prefix=b'[', suffix=b']', chunk_size=chunk_size)
+
+    def __len__(self) -> int:
+        return len(self.prefix) + sum(len(doc) for doc in self.docs) + len(self.separator) * max(0, len(self.docs) - 1) + len(self.suffix)
+
+    def __iter__(self) -> Iterator[bytes]:
+        chunk = [self.prefix]
+        size = len(self.prefix)
+        for di, doc in enumerate(self.docs):
+            if di > 0:
+                chunk.append(self.separator)
+                size += len(self.separator)
+            chunk.append(doc)
+            size += len(doc)
+            if size >= self.chunk_size:
+                yield b''.join(chunk)
+                chunk = []
+                size = 0
+        chunk.append(self.suffix)
+        if size + len(self.suffix) > 0:
+            yield b''.join(chunk)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int) -> Generator[bytes, None, None]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+async def _aiter(chunks: Iterable[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def _update_request(content: str | bytes | JsonBody, compress_level: int = 0) -> tuple[dict[str, str], bytes | str | Iterable[bytes]]:
+    """Headers and body for an update request, gzip-compressed if `compress_level > 0`."""
+    headers = {'Content-Type': 'application/json'}
+    if compress_level > 0:
+        headers['Content-Encoding'] = 'gzip'
+        if isinstance(content, JsonBody):
+            # Compressed on the fly, so the length is unknown and the body is sent with chunked transfer encoding
+            return headers, gzip_chunks(content, compress_level)
+        return headers, gzip.compress(content.encode() if isinstance(content, str) else content, compresslevel=compress_level)
+    if isinstance(content, JsonBody):
+        # The length is known up front, so there is no need for chunked transfer encoding
+        headers['Content-Length'] = str(len(content))
+    return headers, content
+
+
+def _has_http2(http2: bool) -> bool:
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning('HTTP/2 requested, but `h2` is not installed; falling back to HTTP/1.1.')
+            return False
+    return http2
+
+
+class SolrClient:
+    """Pooled keep-alive connection to solr, shared by all helpers in this module.
+
+    Use `get_solr_client` to get the instance for a config rather than creating new ones,
+    so that connections (and TLS sessions) are reused across calls.
+    HTTP/2 requires the `h2` package (`httpx[http2]`) and falls back to HTTP/1.1 without it.
+    With `compress_level > 0`, update bodies are sent gzip-compressed (solr's jetty needs to accept `Content-Encoding: gzip`).
+    """
+
+    def __init__(
+        self,
+        config: OpenAlexConfig,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60,
+        http2: bool = False,
+        timeout: float = 60,
+        compress_level: int = 0,
+    ):
+        self.config = config
+        self.compress_level = compress_level
+        self.client = httpx.Client(
+            auth=config.auth,
+            http2=_has_http2(http2),
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    def close(self) -> None:
+        self.client.close()
+
+    def __enter__(self) -> 'SolrClient':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return self.client.post(url, **kwargs)
+
+    def select(self, data: dict[str, Any], timeout: float = 60) -> list[dict[str, Any]]:
+        res = self.client.post(f'{self.config.solr_url}/select', data=data, timeout=timeout)
+        return res.json()['response'].get('docs', [])
+
+    def select_ids(
+        self,
+        ids: list[str],
+        data: dict[str, Any],
+        id_filter: IdFilter = IdFilter.terms,
+        chunk_size: int | None = None,
+        timeout: float = 60,
+    ) -> list[dict[str, Any]]:
+        """`select` restricted to documents with one of the `ids`, split into requests of at most `chunk_size` IDs."""
+        docs = []
+        for chunk in batched(ids, chunk_size or ID_CHUNK_SIZE[id_filter], strict=False):
+            fq = [ids_query(list(chunk), id_filter), *data.get('fq', [])]
+            docs += self.select(data | {'fq': fq, 'rows': len(chunk)}, timeout=timeout)
+        return docs
+
+    def update(self, content: str | bytes | JsonBody, url: str | None = None, commit: bool = False, timeout: float = 240) -> httpx.Response:
+        headers, body = _update_request(content, compress_level=self.compress_level)
+        res = self.client.post(
+            f'{url or self.config.solr_url + "/update/json"}{"?commit=true" if commit else ""}',
+            headers=headers,
+            content=body,
+            timeout=timeout,
+        )
+        res.raise_for_status()
+        return res
+
+
+class AsyncSolrClient:
+    """asyncio counterpart of `SolrClient` to keep several update requests in flight at once (see `pipeline.bounded`).
+    Unlike `SolrClient`, this is not cached and must be used as `async with` inside the running event loop.
+    """
+
+    def __init__(
+        self,
+        config: OpenAlexConfig,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 60,
+        http2: bool = False,
+        timeout: float = 60,
+        compress_level: int = 0,
+    ):
+        self.config = config
+        self.compress_level = compress_level
+        self.client = httpx.AsyncClient(
+            auth=config.auth,
+            http2=_has_http2(http2),
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> 'AsyncSolrClient':
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def update(self, content: str | bytes | JsonBody, url: str | None = None, commit: bool = False, timeout: float = 240) -> httpx.Response:
+        headers, body = _update_request(content, compress_level=self.compress_level)
+        res = await self.client.post(
+            f'{url or self.config.solr_url + "/update/json"}{"?commit=true" if commit else ""}',
+            headers=headers,
+            content=body if isinstance(body, (bytes, str)) else _aiter(body),
+            timeout=timeout,
+        )
+        res.raise_for_status()
+        return res
+
+
+_clients: dict[tuple[int, str, tuple[tuple[str, Any], ...]], SolrClient] = {}
+
+
+def get_solr_client(config: OpenAlexConfig, **kwargs: Any) -> SolrClient:
+    """Return the `SolrClient` for this config and `kwargs` in the current process, creating it on first use.
+    Clients are kept per process, since connections must not be shared across forked pool workers.
+    """
+    key = (os.getpid(), config.solr_url, tuple(sorted(kwargs.items())))
+    if key not in _clients:
+        _clients[key] = SolrClient(config, **kwargs)
+    return _clients[key]
+
+
+def commit(conf: OpenAlexConfig, client: SolrClient | None = None):
+    client = client or get_solr_client(conf)
     try:
-        httpx.post(f'{conf.SOLR_ENDPOINT}/api/collections/{conf.SOLR_COLLECTION}/update/json?commit=true', timeout=120, auth=conf.auth)
+        client.post(f'{conf.SOLR_ENDPOINT}/api/collections/{conf.SOLR_COLLECTION}/update/json?commit=true', timeout=120)
     except Exception as e:
         logging.warning(f'Timed out on commit ({e})')
 
@@ -32,22 +278,30 @@ def get_entries_with_missing_abstracts(
     created_until: Annotated[datetime | None, typer.Option(help='Get works created or updated on or before')] = None,
     limit: int = 1000,
     logger_: logging.Logger | None = None,
+    id_filter: IdFilter = IdFilter.terms,
+    chunk_size: int | None = None,
 ) -> Generator[tuple[str, str, str], None, None]:
     logger_ = logger_ or logger
     client = OpenAlexSolrAPI(openalex_conf=config, logger=logger_)
     if openalex_ids is not None and len(openalex_ids) > 0:
         logger_.debug('Asking solr for which IDs are missing abstracts.')
-        it = client.fetch_raw(
-            query='-abstract:*',  # -abstract:[* TO ""],
-            params={
-                'fq': f'id:({" OR ".join(openalex_ids)})',
-                'fl': 'id,doi',
-                'q.op': 'AND',
-                'useParams': '',
-                'defType': 'lucene'
-            },
-        )
-        logger_.info(f'Requested {len(openalex_ids):,} of which {client.num_found} (will limit to {limit:,}) have no abstract in solr.')
+
+        def fetch_chunks() -> Generator[dict[str, Any], None, None]:
+            for chunk in batched(openalex_ids, chunk_size or ID_CHUNK_SIZE[id_filter], strict=False):
+                yield from client.fetch_raw(
+                    query='-abstract:*',  # -abstract:[* TO ""],
+                    params={
+                        'fq': ids_query(list(chunk), id_filter),
+                        'fl': 'id,doi',
+                        'q.op': 'AND',
+                        'useParams': '',
+                        'defType': 'lucene',
+                    },
+                )
+                logger_.debug(f'Requested {len(chunk):,} IDs of which {client.num_found} have no abstract in solr.')
+
+        it = fetch_chunks()
+        logger_.info(f'Requested {len(openalex_ids):,} IDs (will limit to {limit:,} without abstract in solr).')
     elif created_since is not None:
         created_since_ = created_since.strftime('%Y-%m-%dT23:58:58Z')
         created_until_ = (created_since or datetime.now()).strftime('%Y-%m-%dT00:00:00Z')
@@ -76,34 +330,33 @@ def get_entries_with_missing_abstracts(
     logger_.info('Finished iterating records with missing abstracts.')
 
 
-def write_cache_records_to_solr(
+def _cache_record_updates(
     config: OpenAlexConfig,
     records: list[Request],
-    force: bool = False,
-    batch_size: int = 200,
-    commit_interval: int = 1000,
-    logger_: logging.Logger | None = None,
-) -> tuple[int, int]:
-    logger_ = logger_ or logger
+    force: bool,
+    batch_size: int,
+    logger_: logging.Logger,
+    sizer: AdaptiveBatchSize | None = None,
+) -> Generator[tuple[JsonBody | None, int, int], None, None]:
+    """Yields the solr update body for each batch of `records` (None if nothing to update) with the number of records and skipped records."""
     sl = logger_.getChild('solr')
     sl.setLevel(logging.WARNING)
-    n_total = 0
-    n_skipped = 0
-    n_uncommitted = 0
-    for batch in batched(records, batch_size, strict=False):
+    for batch in sizer.batched(records) if sizer is not None else batched(records, batch_size, strict=False):
         batch_records = list(batch)
-        n_total += len(batch_records)
         needs_update: set[str] | None = None
         if not force:
-            openalex_ids = [record.openalex_id for record in records]
-            needs_update = {oa_id for oa_id, _doi, _pmid in get_entries_with_missing_abstracts(config=config, openalex_ids=openalex_ids, logger_=sl, limit=len(openalex_ids))}
+            openalex_ids = [record.openalex_id for record in batch_records]
+            needs_update = {
+                oa_id
+                for oa_id, _doi, _pmid in get_entries_with_missing_abstracts(config=config, openalex_ids=openalex_ids, logger_=sl, limit=len(openalex_ids))
+            }
             logger.debug(f'{len(needs_update):,} of {len(openalex_ids):,} currently have no abstract in solr')
-            n_skipped += len(batch_records) - len(needs_update)
             if len(needs_update) <= 0:
                 logger_.info('Partition skipped, seems complete')
+                yield None, len(batch_records), len(batch_records)
                 continue
 
-        buffer = b''
+        docs = []
         timestamp = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
         for record in batch_records:
             if needs_update is not None and record.openalex_id not in needs_update:
@@ -117,31 +370,97 @@ def write_cache_records_to_solr(
                 'abstract_source': {'set': record.wrapper},
                 'abstract_date': {'set': timestamp},
             }
-            buffer += json.dumps(rec) + b',\n'
-            n_uncommitted += 1
+            docs.append(json.dumps(rec))
+
+        yield JsonBody.array(docs), len(batch_records), len(batch_records) - len(needs_update) if needs_update is not None else 0
+
+
+def _measured(sizer: AdaptiveBatchSize | None, n_docs: int, start: float) -> None:
+    if sizer is not None:
+        sizer.success(n_docs, perf_counter() - start)
 
-        try:
-            res = httpx.post(
-                f'{config.solr_url}/update/json',  # ?commit=true
-                headers={'Content-Type': 'application/json'},
-                content=f'[{buffer.decode()}]',
-                timeout=240,
-            )
-            res.raise_for_status()
-        except Exception as e:
-            logger_.error(f'Failed to write to solr: {e}')
-            logger_.error(res.text)
-            raise e
 
+def _failed(e: Exception, logger_: logging.Logger, sizer: AdaptiveBatchSize | None, spool: DeadLetterSpool | None = None, body: JsonBody | None = None) -> None:
+    """Log a failed update and re-raise the error, unless the `body` could be written to the `spool` instead."""
+    logger_.error(f'Failed to write to solr: {e}')
+    if isinstance(e, httpx.HTTPStatusError):
+        logger_.error(e.response.text)
+    if sizer is not None and is_overload(e):
+        sizer.failure(e.__class__.__name__)
+    if spool is None or body is None:
+        raise e
+    spool.add(body.docs, array=True, error=e)
+
+
+def write_cache_records_to_solr(
+    config: OpenAlexConfig,
+    records: list[Request],
+    force: bool = False,
+    batch_size: int = 200,
+    commit_interval: int = 1000,
+    logger_: logging.Logger | None = None,
+    client: SolrClient | None = None,
+    max_inflight: int = 1,
+    sizer: AdaptiveBatchSize | None = None,
+    spool: DeadLetterSpool | None = None,
+) -> tuple[int, int]:
+    """Write abstracts from the meta-cache to solr; with `max_inflight > 1`, several batches are posted concurrently.
+    With a `sizer`, batches follow its size instead of `batch_size` and update latencies are fed back into it.
+    Failed batches abort the transfer, unless there is a `spool` to write them to (they count as written then).
+    """
+    logger_ = logger_ or logger
+    client = client or get_solr_client(config)
+    n_total = 0
+    n_skipped = 0
+    n_uncommitted = 0
+
+    def posted(update: tuple[JsonBody | None, int, int], res: httpx.Response | None) -> None:
+        nonlocal n_total, n_skipped, n_uncommitted
+        _body, n_records, n_skipped_ = update
+        n_total += n_records
+        n_skipped += n_skipped_
+        if res is None:
+            return
+        n_uncommitted += n_records - n_skipped_
         logger_.info(f'Partition posted to solr via {res}')
 
         if (commit_interval > 0) and (n_uncommitted >= commit_interval):
             logger_.info('Committing to solr')
-            commit(config)
+            commit(config, client=client)
             n_uncommitted = 0
 
+    updates = _cache_record_updates(config, records, force=force, batch_size=batch_size, logger_=logger_, sizer=sizer)
+    if max_inflight <= 1:
+        for update in updates:
+            try:
+                start = perf_counter()
+                res = client.update(update[0]) if update[0] is not None else None
+                _measured(sizer, update[1] - update[2], start)
+            except Exception as e:
+                _failed(e, logger_, sizer, spool, update[0])
+                res = None
+            posted(update, res)
+    else:
+
+        async def post_concurrently() -> None:
+            async with AsyncSolrClient(config, max_connections=max_inflight) as async_client:
+
+                async def post(update: tuple[JsonBody | None, int, int]) -> httpx.Response | None:
+                    try:
+                        start = perf_counter()
+                        res = await async_client.update(update[0]) if update[0] is not None else None
+                        _measured(sizer, update[1] - update[2], start)
+                        return res
+                    except Exception as e:
+                        _failed(e, logger_, sizer, spool, update[0])
+                        return None
+
+                await bounded(updates, post, posted, max_inflight=max_inflight)
+
+        asyncio.run(post_concurrently())
+
     logger_.info('Committing to solr')
-    commit(config)
+    commit(config, client=client)
 
     return n_total, n_skipped
 
@@ -149,8 +468,11 @@ def write_cache_records_to_solr(
 def write_api_update_to_solr(
     config: OpenAlexConfig,
     works: Iterator[WorksSchema],
+    client: SolrClient | None = None,
+    id_filter: IdFilter = IdFilter.terms,
+    sizer: AdaptiveBatchSize | None = None,
 ) -> None:
-    """Submit new or updated records to solr.
+    """Submit new or updated records to solr (feeding the update latency back to the `sizer` if there is one).
     This makes sure that we don't accidentally delete abstracts along the way.
     This always replaces all fields with the new value for exising IDs, except for the abstract field.
 
@@ -162,19 +484,14 @@ def write_api_update_to_solr(
         * if existing record has abstract and work has no abstract -> keep old abstract and set `abstract_source` to 'OpenAlex_old'
         * if abstract changed in any way, set the `abstract_date`
     """
-    res: httpx.Response | None = None
+    client = client or get_solr_client(config)
     try:
         solr_works = {w.id: translate_work_to_solr(w, source=w.abstract_source or 'OpenAlex', authorship_limit=50) for w in works}
-        res = httpx.post(
-            f'{config.solr_url}/select',
-            data={
-                'fq': ['abstract:*', f'id:({" OR ".join(solr_works.keys())})'],
-                'fl': 'id,abstract_source',
-                'rows': len(solr_works),
-            },
-            timeout=60,
+        existing_works = client.select_ids(
+            list(solr_works.keys()),
+            data={'fq': ['abstract:*'], 'fl': 'id,abstract,abstract_source'},
+            id_filter=id_filter,
         )
-        existing_works = res.json()['response']['docs']
         logger.debug(f'Checked {len(solr_works)} OpenAlex IDs and found {len(existing_works)} with an abstract in solr.')
 
         timestamp = datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
@@ -191,36 +508,67 @@ def write_api_update_to_solr(
             if new_work['abstract'] != exising_work['abstract']:
                 solr_works[exising_work['id']]['abstract_date'] = timestamp
 
-        res = httpx.post(
-            url=f'{config.solr_collections_url}/update/json?commit=true',
-            timeout=240,
-            headers={'Content-Type': 'application/json'},
-            content=b'\n'.join([json.dumps(w) for w in solr_works.values()]).decode(),
+        start = perf_counter()
+        client.update(
+            JsonBody([json.dumps(w) for w in solr_works.values()]),
+            url=f'{config.solr_collections_url}/update/json',
+            commit=True,
         )
-        res.raise_for_status()
+        _measured(sizer, len(solr_works), start)
     except httpx.HTTPError as e:
-        if res:
-            logger.error(res.text)
+        if sizer is not None and is_overload(e):
+            sizer.failure(e.__class__.__name__)
+        if isinstance(e, httpx.HTTPStatusError):
+            logger.error(e.response.text)
         logger.error(f'Failed to submit: {e}')
         logger.exception(e)
 
 
-def check_openalex_ids(config: OpenAlexConfig, reference_ids: list[str], check_abstract: bool = True, return_fields: str = 'id,title') -> list[dict[str, Any]]:
-    """Check if IDs are in solr and optionally if those have an abstract."""
-    fq = [f'id:({" OR ".join(reference_ids)})']
-    if check_abstract:
-        fq.append('-abstract:*')
-    res = httpx.post(
-        f'{config.solr_url}/select',
+def check_openalex_ids(
+    config: OpenAlexConfig,
+    reference_ids: list[str],
+    check_abstract: bool = True,
+    return_fields: str = 'id,title',
+    client: SolrClient | None = None,
+    id_filter: IdFilter = IdFilter.terms,
+    chunk_size: int | None = None,
+) -> list[dict[str, Any]]:
+    """Check if IDs are in solr and optionally if those have an abstract.
+    ID lists longer than `chunk_size` (default depends on `id_filter`) are split across several requests."""
+    client = client or get_solr_client(config)
+    return client.select_ids(
+        reference_ids,
         data={
             'q': '*:*',
-            'fq': fq,
+            'fq': ['-abstract:*'] if check_abstract else [],
             'fl': return_fields,
-            'rows': len(reference_ids),
         },
-        timeout=60,
+        id_filter=id_filter,
+        chunk_size=chunk_size,
+    )
+
+
+def check_openalex_ids_with_abstract(
+    config: OpenAlexConfig,
+    reference_ids: list[str],
+    return_fields: str = 'id,title',
+    client: SolrClient | None = None,
+    id_filter: IdFilter = IdFilter.terms,
+    chunk_size: int | None = None,
+) -> list[dict[str, Any]]:
+    """Like `check_openalex_ids`, but returns all IDs found in solr with an additional `has_abstract` field in a single query
+    (instead of one query for matches and another one for matches without abstract)."""
+    client = client or get_solr_client(config)
+    return client.select_ids(
+        reference_ids,
+        data={
+            'q': '*:*',
+            'fl': f'{return_fields},has_abstract:exists(query($abstract_q))',
+            'abstract_q': 'abstract:*',
+        },
+        id_filter=id_filter,
+        chunk_size=chunk_size,
     )
-    return res.json()['response'].get('docs', [])
 
 
 def random_sample(
@@ -231,16 +579,13 @@ def random_sample(
     seed: int | str = 4243,
     sample_size: int = 1000,
     params: dict[str, str | int] | None = None,
+    client: SolrClient | None = None,
 ) -> list[dict[str, Any]]:
     """Get a random sample from OpenAlex."""
+    client = client or get_solr_client(config)
     fq = []
     if ensure_abstract:
         fq.append('abstract:*')
     if not include_xpac:
         fq.append('is_xpac:false')  #  OR -is_xpac:*
-    res = httpx.post(
-        f'{config.solr_url}/select',
-        data={'q': '*:*', 'fq': fq, 'fl': return_fields, 'rows': sample_size, 'sort': f'random_{seed} asc'} | (params or {}),
-        timeout=60,
-    )
-    return res.json()['response'].get('docs', [])
+    return client.select(data={'q': '*:*', 'fq': fq, 'fl': return_fields, 'rows': sample_size, 'sort': f'random_{seed} asc'} | (params or {}))
@@ -0,0 +1,69 @@
+import os
+import gzip
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Generator
+
+import msgspec
+from msgspec import Struct
+
+logger = logging.getLogger('openalex.shared.spool')
+
+SPOOL_GLOB = '*.ndjson.gz'
+
+
+class FailedUpdate(Struct):
+    time: str  # when the update was given up on
+    source: str  # where the documents came from (partition, shard, or command)
+    url: str  # update endpoint the batch was posted to (replayed to the same one)
+    array: bool  # whether the body was a JSON array (otherwise newline-delimited documents)
+    error: str | None
+    docs: list[msgspec.Raw]  # the serialised solr documents, exactly as they were sent
+
+    def doc_bytes(self) -> list[bytes]:
+        return [bytes(doc) for doc in self.docs]
+
+
+class DeadLetterSpool:
+    """Gzip-compressed NDJSON file of update batches that solr did not accept, one `FailedUpdate` per line.
+
+    The file is only created on the first failure. Every batch is appended as its own gzip member,
+    so entries written before a crash stay readable. Re-post them with `snapshot replay-failed`.
+    """
+
+    def __init__(self, spool_dir: Path, name: str, url: str):
+        self.file = spool_dir / f'{name}-{datetime.now().strftime("%Y%m%d-%H%M%S")}-{os.getpid()}.ndjson.gz'
+        self.name = name
+        self.url = url
+        self.n_batches = 0
+        self.n_docs = 0
+        self.encoder = msgspec.json.Encoder()
+
+    def add(self, docs: list[bytes], array: bool = False, source: str | None = None, error: BaseException | str | None = None, url: str | None = None) -> None:
+        entry = FailedUpdate(
+            time=datetime.now().isoformat(),
+            source=source or self.name,
+            url=url or self.url,
+            array=array,
+            error=str(error) if error is not None else None,
+            docs=[msgspec.Raw(doc) for doc in docs],
+        )
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.file, 'ab') as f_out:
+            f_out.write(self.encoder.encode(entry) + b'\n')
+        self.n_batches += 1
+        self.n_docs += len(docs)
+        logger.warning(f'Spooled {len(docs):,} documents from {entry.source} to {self.file}')
+
+
+def read_spool(file: Path) -> Generator[FailedUpdate, None, None]:
+    """Entries of a spool file; a member that was cut off by a crash is skipped with a warning."""
+    decoder = msgspec.json.Decoder(FailedUpdate)
+    try:
+        with gzip.open(file, 'rb') as f_in:
+            for line in f_in:
+                if line.strip():
+                    yield decoder.decode(line)
+    except (EOFError, msgspec.DecodeError) as e:
+        logger.warning(f'Spool file {file} ends in a truncated entry, skipping the rest: {e}')
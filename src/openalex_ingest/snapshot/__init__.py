@@ -2,11 +2,19 @@ import typer
 
 from .match.sync import main as retain_old
 from .load import update_solr
+from .diff import diff_ingest
+from .translate import check_parity
+from .idindex import build_id_index
+from .replay import replay_failed
 
 app = typer.Typer()
 
 app.command('retain-old', help='Process old snapshot and write abstracts that are now missing to meta-cache and solr')(retain_old)
 app.command('ingest', help='Ingest S3 snapshot')(update_solr)
+app.command('diff-ingest', help='Ingest only partitions that are new or changed since the last ingest')(diff_ingest)
+app.command('check-engine', help='Compare msgspec and pydantic translation of works on sample partitions')(check_parity)
+app.command('id-index', help='Build or update a local index of work IDs and whether they have an abstract')(build_id_index)
+app.command('replay-failed', help='Re-post batches that failed to post and were written to a dead-letter spool')(replay_failed)
 
 __all__ = [
     'app',
@@ -0,0 +1,172 @@
+import logging
+from pathlib import Path
+from typing import Annotated
+
+import typer
+import orjson as json
+from msgspec import Struct
+
+from openalex_ingest.shared.decompress import GzipBackend
+from openalex_ingest.snapshot.load import (
+    AdaptiveOpt,
+    Collection,
+    CollectionOpt,
+    CommitIntervalOpt,
+    CompressLevelOpt,
+    ConfigFileOpt,
+    EngineOpt,
+    GzipBackendOpt,
+    Http2Opt,
+    LoglevelOpt,
+    MaxInflightOpt,
+    MaxRetryOpt,
+    PostBatchsizeOpt,
+    QueueDepthOpt,
+    ReadBatchsizeOpt,
+    Schedule,
+    ScheduleOpt,
+    ShardSizeOpt,
+    SnapshotOpt,
+    SpoolDirOpt,
+    TargetLatencyOpt,
+    WorkersOpt,
+    ingest_partitions,
+    log_spooled,
+    setup_ingest,
+)
+from openalex_ingest.snapshot.manifest import Manifest
+from openalex_ingest.snapshot.translate import Engine
+
+
+class SnapshotDiff(Struct):
+    new: list[Path]  # never ingested before
+    changed: list[Path]  # size or mtime differ from when they were ingested
+    unfinished: list[Path]  # unchanged, but the last ingest did not complete
+    unchanged: list[Path]
+    removed: list[str]  # recorded in our manifest but no longer in the snapshot
+    incomplete: list[Path]  # size does not match the OpenAlex manifest (e.g. sync still running)
+
+
+def read_openalex_manifest(snapshot: Path) -> dict[Path, int] | None:
+    """Read expected file sizes from the `manifest` OpenAlex ships with the works partitions."""
+    manifest_file = snapshot / 'data' / 'works' / 'manifest'
+    if not manifest_file.exists():
+        return None
+    with open(manifest_file, 'rb') as f_in:
+        manifest = json.loads(f_in.read())
+    return {snapshot / 'data' / entry['url'].split('/data/', 1)[1]: entry['meta']['content_length'] for entry in manifest.get('entries', [])}
+
+
+def diff_snapshot(snapshot: Path, manifest: Manifest) -> SnapshotDiff:
+    """Compare the partitions on disk with the state recorded in the ingest manifest."""
+    partitions = sorted(snapshot.glob('data/works/**/*.gz'))
+    expected = read_openalex_manifest(snapshot)
+    states = manifest.states()
+
+    diff = SnapshotDiff(new=[], changed=[], unfinished=[], unchanged=[], removed=[], incomplete=[])
+    for partition in partitions:
+        stat = partition.stat()
+        if expected is not None and expected.get(partition, stat.st_size) != stat.st_size:
+            diff.incomplete.append(partition)
+            continue
+        state = states.get(str(partition))
+        if state is None:
+            diff.new.append(partition)
+        elif state.size != stat.st_size or state.mtime != stat.st_mtime:
+            diff.changed.append(partition)
+        elif not state.completed:
+            diff.unfinished.append(partition)
+        else:
+            diff.unchanged.append(partition)
+
+    on_disk = {str(partition) for partition in partitions}
+    diff.removed = sorted(path for path in states.keys() if path not in on_disk)
+    return diff
+
+
+def diff_ingest(
+    snapshot: SnapshotOpt,
+    config_file: ConfigFileOpt,
+    post_batchsize: PostBatchsizeOpt = 1000,
+    read_batchsize: ReadBatchsizeOpt = 50000,
+    commit_interval: CommitIntervalOpt = -1,
+    max_retry: MaxRetryOpt = 10,
+    collection: CollectionOpt = Collection.all,
+    workers: WorkersOpt = 1,
+    queue_depth: QueueDepthOpt = 4,
+    engine: EngineOpt = Engine.pydantic,
+    manifest_file: Annotated[Path | None, typer.Option(help='SQLite file with the state of the last ingest (default: in snapshot folder)')] = None,
+    http2: Http2Opt = False,
+    max_inflight: MaxInflightOpt = 1,
+    gzip_backend: GzipBackendOpt = GzipBackend.auto,
+    compress_level: CompressLevelOpt = 0,
+    adaptive: AdaptiveOpt = False,
+    target_latency: TargetLatencyOpt = 5.0,
+    shard_size: ShardSizeOpt = 0,
+    schedule: ScheduleOpt = Schedule.size,
+    spool_dir: SpoolDirOpt = None,
+    dry_run: Annotated[bool, typer.Option(help='Only report differences, do not ingest anything')] = False,
+    loglevel: LoglevelOpt = 'INFO',
+) -> None:
+    """Ingest only partitions that are new or changed since the last ingest recorded in the manifest."""
+    config = setup_ingest(config_file=config_file, loglevel=loglevel)
+
+    manifest_file = manifest_file or (snapshot / 'ingest-manifest.sqlite3')
+    spool_dir = spool_dir or manifest_file.with_name(f'{manifest_file.stem}-failed')
+    manifest = Manifest(manifest_file)
+    diff = diff_snapshot(snapshot, manifest)
+
+    logging.info(f'Comparing snapshot at {snapshot} to the state recorded in {manifest_file}:')
+    logging.info(f'  {len(diff.new):,} new partitions')
+    logging.info(f'  {len(diff.changed):,} changed partitions')
+    logging.info(f'  {len(diff.unfinished):,} partitions that were not fully ingested last time')
+    logging.info(f'  {len(diff.unchanged):,} unchanged partitions')
+    logging.info(f'  {len(diff.removed):,} partitions removed from the snapshot')
+    for path in diff.removed:
+        logging.info(f'    - {path}')
+    if len(diff.incomplete) > 0:
+        logging.warning(f'  {len(diff.incomplete):,} partitions do not match the size in the OpenAlex manifest and will be skipped (incomplete sync?)')
+        for partition in diff.incomplete:
+            logging.warning(f'    - {partition}')
+
+    partitions = diff.new + diff.changed + diff.unfinished
+    if dry_run or len(partitions) == 0:
+        manifest.close()
+        logging.info('Nothing to do.' if len(partitions) == 0 else 'Dry run, not ingesting anything.')
+        return
+
+    # changed partitions start from scratch, unfinished ones continue after their last checkpoint
+    manifest.reset(diff.changed)
+
+    logging.getLogger('root').setLevel(logging.WARNING)
+    stats = ingest_partitions(
+        partitions=partitions,
+        config=config.OPENALEX,
+        workers=workers,
+        commit_interval=commit_interval,
+        shard_size=shard_size * 1024 * 1024,
+        shard_dir=manifest_file.with_name(f'{manifest_file.stem}-shards'),
+        schedule=schedule,
+        collection=collection,
+        post_batchsize=post_batchsize,
+        read_batchsize=read_batchsize,
+        max_retry=max_retry,
+        queue_depth=queue_depth,
+        engine=engine,
+        manifest_file=manifest_file,
+        http2=http2,
+        max_inflight=max_inflight,
+        gzip_backend=gzip_backend,
+        compress_level=compress_level,
+        adaptive=adaptive,
+        target_latency=target_latency,
+        spool_dir=spool_dir,
+    )
+    logging.getLogger('root').setLevel(loglevel)
+
+    # forget about removed partitions, so the manifest reflects the current snapshot
+    manifest.reset([Path(path) for path in diff.removed])
+    manifest.close()
+
+    logging.info(f'Finished loading {len(partitions):,} partitions! Read {stats.n_read:,} works, posted {stats.n_posted:,}, failed to post {stats.n_failed:,}.')
+    log_spooled(stats, spool_dir)
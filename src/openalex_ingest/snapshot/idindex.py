@@ -0,0 +1,212 @@
+import os
+import shutil
+import logging
+from datetime import datetime
+from enum import Enum
+from pathlib import Path
+from typing import Annotated, Any, Generator
+
+import typer
+import numpy as np
+import orjson as json
+from msgspec.json import Decoder
+from tqdm import tqdm
+
+from openalex_ingest.shared.config import load_settings
+from openalex_ingest.shared.decompress import read_lines
+from openalex_ingest.shared.solr import SolrClient, get_solr_client
+from openalex_ingest.shared.util import get_logger
+from openalex_ingest.snapshot.match.structs import NULL, WorkPresence
+
+logger = logging.getLogger('openalex.snapshot.idindex')
+
+IDS_FILE = 'ids.npy'
+ABSTRACTS_FILE = 'has_abstract.npy'
+META_FILE = 'meta.json'
+CURRENT = 'current'  # symlink to the version directory with the files above
+
+Chunk = tuple[np.ndarray, np.ndarray]  # work IDs (uint64) and whether they have an abstract (bool)
+
+
+def index_files(path: Path) -> Path:
+    """Directory with the files of the current version of the index in `path` (older indices keep them in `path` itself)."""
+    return (path / CURRENT).resolve() if (path / CURRENT).is_symlink() else path
+
+
+def work_id_to_int(openalex_id: str) -> int:
+    """'https://openalex.org/W123' or 'W123' -> 123"""
+    return int(openalex_id.rsplit('/', 1)[-1][1:])
+
+
+class IdIndex:
+    """Local index of which works exist (in solr or a snapshot) and whether they have an abstract.
+
+    It consists of a sorted array of numeric work IDs and a bitset aligned with it, both memory-mapped
+    from a directory built by `snapshot id-index`. Lookups are a binary search per ID, so checking a batch
+    of IDs takes microseconds instead of a round-trip to solr. The index is only as fresh as its last
+    (incremental) build, so only rule out IDs it knows to have an abstract and confirm everything else with solr.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        files = index_files(path)
+        self.ids = np.load(files / IDS_FILE, mmap_mode='r')
+        self.abstract_bits = np.load(files / ABSTRACTS_FILE, mmap_mode='r')
+        with open(files / META_FILE, 'rb') as f_in:
+            self.meta: dict[str, Any] = json.loads(f_in.read())
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, openalex_id: str) -> bool:
+        return bool(self.lookup([openalex_id])[0][0])
+
+    def lookup(self, openalex_ids: list[str]) -> Chunk:
+        """Returns two boolean arrays aligned with `openalex_ids`: whether each ID is known and whether it has an abstract."""
+        keys = np.fromiter((work_id_to_int(oa_id) for oa_id in openalex_ids), dtype=np.uint64, count=len(openalex_ids))
+        if len(self.ids) == 0:
+            return np.zeros(len(keys), dtype=bool), np.zeros(len(keys), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.ids, keys), len(self.ids) - 1)
+        found = self.ids[pos] == keys
+        has_abstract = found & (((self.abstract_bits[pos >> 3] >> (pos & 7).astype(np.uint8)) & 1) == 1)
+        return found, has_abstract
+
+    def missing_abstract(self, openalex_ids: list[str]) -> list[str]:
+        """Subset of `openalex_ids` that might have no abstract: known without one or not (yet) in the index.
+        Only IDs the index knows to have an abstract are ruled out, so works added after the last build are not dropped."""
+        _, has_abstract = self.lookup(openalex_ids)
+        return [oa_id for oa_id, missing in zip(openalex_ids, ~has_abstract, strict=True) if missing]
+
+    def all(self) -> Chunk:
+        """All IDs and the unpacked bitset (loads the full index into memory)."""
+        return np.asarray(self.ids), np.unpackbits(self.abstract_bits, count=len(self.ids), bitorder='little').astype(bool)
+
+
+def write_index(path: Path, ids: np.ndarray, has_abstract: np.ndarray, meta: dict[str, Any]) -> None:
+    """Sort and de-duplicate (the last occurrence of an ID wins) and (over)write the index in `path`.
+
+    Every build is written to a new version directory and the `current` symlink is then swapped over to it in one step,
+    so readers (and crashed or concurrent builds) never see IDs and bitset of different versions. Older versions are removed;
+    indices that are open keep working, as their memory-mapped files stay around until they are closed.
+    """
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    has_abstract = has_abstract[order]
+    last = np.ones(len(ids), dtype=bool)
+    last[:-1] = ids[1:] != ids[:-1]
+    ids = ids[last]
+    has_abstract = has_abstract[last]
+
+    version = path / f'v{datetime.now().strftime("%Y%m%d-%H%M%S-%f")}-{os.getpid()}'
+    version.mkdir(parents=True)
+    np.save(version / IDS_FILE, ids)
+    np.save(version / ABSTRACTS_FILE, np.packbits(has_abstract, bitorder='little'))
+    with open(version / META_FILE, 'wb') as f_out:
+        f_out.write(json.dumps(meta | {'n_ids': len(ids), 'n_with_abstract': int(has_abstract.sum())}))
+
+    link = path / f'{CURRENT}.{os.getpid()}.tmp'
+    link.unlink(missing_ok=True)
+    link.symlink_to(version.name)
+    os.replace(link, path / CURRENT)
+
+    for previous in path.glob('v*'):
+        if previous.is_dir() and previous not in (version, index_files(path)):
+            shutil.rmtree(previous, ignore_errors=True)
+    for name in [IDS_FILE, ABSTRACTS_FILE, META_FILE]:  # files of an index built before versions were introduced
+        (path / name).unlink(missing_ok=True)
+
+
+def read_solr(client: SolrClient, fq: list[str] | None = None, batch_size: int = 10000) -> Generator[Chunk, None, None]:
+    """Export IDs and abstract presence from solr via cursor paging."""
+    params: dict[str, Any] = {
+        'q': '*:*',
+        'fq': fq or [],
+        'fl': 'id,has_abstract:exists(query($abstract_q))',
+        'abstract_q': 'abstract:*',
+        'sort': 'id asc',
+        'rows': batch_size,
+        'cursorMark': '*',
+    }
+    while True:
+        res = client.post(f'{client.config.solr_url}/select', data=params, timeout=120)
+        res.raise_for_status()
+        page = res.json()
+        docs = page['response']['docs']
+        if len(docs) > 0:
+            yield (
+                np.fromiter((work_id_to_int(doc['id']) for doc in docs), dtype=np.uint64, count=len(docs)),
+                np.fromiter((doc['has_abstract'] for doc in docs), dtype=bool, count=len(docs)),
+            )
+        if page.get('nextCursorMark', params['cursorMark']) == params['cursorMark']:
+            break
+        params['cursorMark'] = page['nextCursorMark']
+
+
+def read_snapshot(partitions: list[Path]) -> Generator[Chunk, None, None]:
+    """Read IDs and abstract presence from snapshot partitions (without decoding the abstracts)."""
+    decoder = Decoder(WorkPresence)
+    for partition in partitions:
+        ids: list[int] = []
+        has_abstract: list[bool] = []
+        for line in read_lines(partition):
+            work = decoder.decode(line)
+            if work.id is None:
+                continue
+            ids.append(work_id_to_int(work.id))
+            has_abstract.append(work.abstract_inverted_index != NULL and bytes(work.abstract_inverted_index) != b'{}')
+        yield np.array(ids, dtype=np.uint64), np.array(has_abstract, dtype=bool)
+
+
+class IndexSource(str, Enum):
+    solr = 'solr'  # what is currently in solr (includes abstracts from other sources)
+    snapshot = 'snapshot'  # what is in the OpenAlex snapshot
+
+
+def build_id_index(
+    index: Annotated[Path, typer.Option(help='Directory to write the index to')],
+    source: Annotated[IndexSource, typer.Option(help='Where to read IDs and abstract presence from')] = IndexSource.solr,
+    config: Annotated[Path | None, typer.Option(help='Path to config file (for --source=solr)')] = None,
+    snapshot: Annotated[Path | None, typer.Option(help='Path to openalex snapshot (for --source=snapshot)')] = None,
+    since: Annotated[datetime | None, typer.Option(help='Only read works updated since then and merge them into the existing index')] = None,
+    batch_size: Annotated[int, typer.Option(help='Number of documents per page when exporting from solr')] = 10000,
+    loglevel: Annotated[str, typer.Option(help='Log level')] = 'INFO',
+) -> None:
+    """Build (or incrementally update) a local index of work IDs and whether they have an abstract."""
+    logger_ = get_logger('id-index', run_log_init=True, loglevel=loglevel)
+
+    if source == IndexSource.solr:
+        if config is None:
+            raise typer.BadParameter('--config is required for --source=solr')
+        fq = None
+        if since is not None:
+            since_ = since.strftime('%Y-%m-%dT%H:%M:%SZ')
+            fq = [f'updated_date:[{since_} TO *] OR abstract_date:[{since_} TO *]']
+        chunks = read_solr(get_solr_client(load_settings(config).OPENALEX), fq=fq, batch_size=batch_size)
+    else:
+        if snapshot is None:
+            raise typer.BadParameter('--snapshot is required for --source=snapshot')
+        # Partitions are sorted by update date, so later versions of a work win
+        partitions = sorted(snapshot.glob('data/works/**/*.gz'))
+        if since is not None:
+            partitions = [p for p in partitions if p.parent.name >= f'updated_date={since.strftime("%Y-%m-%d")}']
+        logger_.info(f'Reading {len(partitions):,} partitions from {snapshot}')
+        chunks = read_snapshot(partitions)
+
+    ids: list[np.ndarray] = []
+    has_abstract: list[np.ndarray] = []
+    meta: dict[str, Any] = {'source': source.value, 'time_built': datetime.now().isoformat()}
+    if since is not None and (index_files(index) / IDS_FILE).exists():
+        previous = IdIndex(index)
+        logger_.info(f'Merging updates since {since} into existing index with {len(previous):,} IDs')
+        ids_, has_abstract_ = previous.all()
+        ids.append(ids_)
+        has_abstract.append(has_abstract_)
+        meta = previous.meta | {'time_updated': datetime.now().isoformat()}
+
+    for ids_, has_abstract_ in tqdm(chunks, desc='Reading IDs'):
+        ids.append(ids_)
+        has_abstract.append(has_abstract_)
+
+    write_index(index, np.concatenate(ids or [np.array([], dtype=np.uint64)]), np.concatenate(has_abstract or [np.array([], dtype=bool)]), meta)
+    index_ = IdIndex(index)
+    logger_.info(f'Wrote index with {len(index_):,} IDs ({index_.meta["n_with_abstract"]:,} with abstract) to {index}')
@@ -1,20 +1,36 @@
-import gzip
+import asyncio
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from enum import Enum
+from functools import partial
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
-from time import sleep
+from time import perf_counter, sleep
+from typing import Any, Callable, Generator, Iterator
 
 import tqdm
 import httpx
 import typer
 import orjson as json
+from msgspec import Struct
+from msgspec.json import Decoder
 
 from nacsos_data.models.openalex import WorksSchema
 from nacsos_data.util import batched
+from nacsos_data.util.conf import OpenAlexConfig
 from typing_extensions import Annotated
 from nacsos_data.util.academic.apis.openalex import translate_work_to_solr
-from openalex_ingest.shared.config import load_settings
-from openalex_ingest.shared.solr import commit
+from openalex_ingest.shared.batching import AdaptiveBatchSize, is_overload
+from openalex_ingest.shared.config import Settings, load_settings
+from openalex_ingest.shared.decompress import GzipBackend, read_lines
+from openalex_ingest.shared.pipeline import bounded, staged
+from openalex_ingest.shared.solr import AsyncSolrClient, JsonBody, SolrClient, commit, get_solr_client
+from openalex_ingest.shared.spool import DeadLetterSpool
+from openalex_ingest.snapshot.manifest import Manifest
+from openalex_ingest.snapshot.shards import Shard, read_shard, split_partition
+from openalex_ingest.snapshot.match.structs import Work
+from openalex_ingest.snapshot.translate import Engine, translate_work
 
 
 class Collection(str, Enum):
@@ -23,23 +39,305 @@ class Collection(str, Enum):
     base = 'base'
 
 
+class PartitionStats(Struct):
+    partition: str
+    n_read: int = 0
+    n_posted: int = 0
+    n_failed: int = 0
+    n_uncommited: int = 0  # documents posted since the last commit, carried over to the next partition
+
+
 def name_part(partition: Path):
     update = str(partition.parent.name).replace('updated_date=', '')
     return f'{update}-{partition.stem}'
 
 
-def update_solr(
-    snapshot: Annotated[Path, typer.Option(help='Path to openalex snapshot from S3')],
-    config_file: Annotated[Path, typer.Option(help='Path to config file')],
-    skip_n_partitions: Annotated[int, typer.Option(help='')] = 0,
-    filter_since: Annotated[str, typer.Option(help='')] = '2000-01-01',
-    post_batchsize: Annotated[int, typer.Option(help='')] = 1000,
-    read_batchsize: Annotated[int, typer.Option(help='')] = 50000,
-    commit_interval: Annotated[int, typer.Option(help='')] = -1,
-    max_retry: Annotated[int, typer.Option(help='')] = 10,
-    collection: Annotated[Collection, typer.Option(help='Which collection to filter')] = Collection.all,
-    loglevel: Annotated[str, typer.Option(help='')] = 'INFO',
+def update_url(config: OpenAlexConfig) -> str:
+    return f'{config.SOLR_ENDPOINT}/api/collections/{config.SOLR_COLLECTION}/update/json'  # ?overwrite=true'
+
+
+# Pieces of a batch that could not be posted, each with the last error it failed with
+FailedPieces = list[tuple[list[bytes], Exception]]
+
+
+def post_batch(
+    config: OpenAlexConfig,
+    post_works: list[bytes],
+    max_retry: int = 10,
+    client: SolrClient | None = None,
+    sizer: AdaptiveBatchSize | None = None,
+) -> FailedPieces:
+    """Post serialised solr documents, retrying with increasing back-off; returns the documents that could not be posted.
+
+    With a `sizer`, latencies are fed back into it and a batch that times out (or fails with a 5xx) is split in half
+    and the halves are posted right away instead of backing off and resending the same oversized batch.
+    All pieces share one budget of `max_retry` attempts, so an outage costs no more requests and back-off than without
+    splitting; once it is used up, every remaining piece is tried once more and returned as failed if solr rejects it.
+    """
+    client = client or get_solr_client(config)
+    pieces = [post_works]
+    failed: FailedPieces = []
+    retry = 0
+    while len(pieces) > 0:
+        works = pieces.pop()
+        try:
+            start = perf_counter()
+            client.update(JsonBody(works), url=update_url(config))
+            if sizer is not None:
+                sizer.success(len(works), perf_counter() - start)
+            continue
+        except (Exception, httpx.WriteTimeout, httpx.ReadTimeout, httpx.HTTPError, httpx.HTTPStatusError) as e:
+            error = e
+        if retry >= max_retry:
+            # budget used up: remaining pieces only get a single attempt
+            failed.append((works, error))
+            continue
+        if sizer is not None and is_overload(error):
+            sizer.failure(f'{error.__class__.__name__} for {len(works):,} documents')
+            if len(works) > sizer.minimum:
+                half = len(works) // 2
+                pieces += [works[half:], works[:half]]
+                continue
+        retry += 1
+        if retry >= max_retry:
+            failed.append((works, error))
+            continue
+        logging.error(error)
+        logging.warning(f'Will try again in {(retry - 1) * 60} seconds...')
+        sleep((retry - 1) * 60)
+        pieces.append(works)
+    return failed
+
+
+async def post_batch_async(
+    config: OpenAlexConfig,
+    post_works: list[bytes],
+    client: AsyncSolrClient,
+    max_retry: int = 10,
+    sizer: AdaptiveBatchSize | None = None,
+) -> FailedPieces:
+    """Same as `post_batch`, but on an `AsyncSolrClient`, so other batches continue to post while this one backs off."""
+    pieces = [post_works]
+    failed: FailedPieces = []
+    retry = 0
+    while len(pieces) > 0:
+        works = pieces.pop()
+        try:
+            start = perf_counter()
+            await client.update(JsonBody(works), url=update_url(config))
+            if sizer is not None:
+                sizer.success(len(works), perf_counter() - start)
+            continue
+        except Exception as e:
+            error = e
+        if retry >= max_retry:
+            # budget used up: remaining pieces only get a single attempt
+            failed.append((works, error))
+            continue
+        if sizer is not None and is_overload(error):
+            sizer.failure(f'{error.__class__.__name__} for {len(works):,} documents')
+            if len(works) > sizer.minimum:
+                half = len(works) // 2
+                pieces += [works[half:], works[:half]]
+                continue
+        retry += 1
+        if retry >= max_retry:
+            failed.append((works, error))
+            continue
+        logging.error(error)
+        logging.warning(f'Will try again in {(retry - 1) * 60} seconds...')
+        await asyncio.sleep((retry - 1) * 60)
+        pieces.append(works)
+    return failed
+
+
+def post_sequentially(
+    batches: Iterator[tuple[list[bytes], int]],
+    config: OpenAlexConfig,
+    on_posted: Callable[[list[bytes], int, FailedPieces], None],
+    max_retry: int = 10,
+    client: SolrClient | None = None,
+    describe: Callable[[str], None] | None = None,
+    sizer: AdaptiveBatchSize | None = None,
+) -> None:
+    """Upload stage posting one batch at a time; `on_posted` gets the pieces of the batch that could not be posted."""
+    for post_works, n_lines in batches:
+        if describe is not None:
+            describe('POST')
+        on_posted(post_works, n_lines, post_batch(config, post_works, max_retry=max_retry, client=client, sizer=sizer) if len(post_works) > 0 else [])
+        if describe is not None:
+            describe('READ')
+
+
+async def post_concurrently(
+    batches: Iterator[tuple[list[bytes], int]],
+    config: OpenAlexConfig,
+    on_posted: Callable[[list[bytes], int, FailedPieces], None],
+    max_inflight: int = 4,
+    max_retry: int = 10,
+    http2: bool = False,
+    compress_level: int = 0,
+    sizer: AdaptiveBatchSize | None = None,
 ) -> None:
+    """Upload stage with up to `max_inflight` batches posted at once; `on_posted` is called in input order."""
+    async with AsyncSolrClient(config, max_connections=max_inflight, http2=http2, compress_level=compress_level) as client:
+
+        async def post(batch: tuple[list[bytes], int]) -> FailedPieces:
+            if len(batch[0]) == 0:
+                return []
+            return await post_batch_async(config, batch[0], client=client, max_retry=max_retry, sizer=sizer)
+
+        await bounded(batches, post, lambda batch, failed: on_posted(*batch, failed), max_inflight=max_inflight)
+
+
+def translate_lines(
+    batches: Iterator[list[bytes]],
+    engine: Engine,
+    collection: Collection,
+    post_batchsize: int,
+    n_lines: int,
+    stats: PartitionStats,
+    sizer: AdaptiveBatchSize | None = None,
+) -> Generator[tuple[list[bytes], int], None, None]:
+    """Translate stage of the ingest pipeline.
+
+    Yields batches of serialised solr documents together with the line number (exclusive) up to which the partition is done,
+    `n_lines` is the number of lines that were skipped at the start of the partition.
+    Batches have `post_batchsize` documents, or the current size of the `sizer` if there is one.
+    """
+    decoder = Decoder(Work)
+    translate = translate_work if engine == Engine.msgspec else translate_work_to_solr
+    buffer: list[bytes] = []
+    for batch in batches:
+        for line in batch:
+            n_lines += 1
+            work = decoder.decode(line) if engine == Engine.msgspec else WorksSchema.model_validate(json.loads(line))
+            stats.n_read += 1
+            if collection == Collection.all or (collection == Collection.base and not work.is_xpac) or (collection == Collection.xpac and work.is_xpac):
+                buffer.append(json.dumps(translate(work, source='OpenAlex', authorship_limit=50)))
+                if len(buffer) >= (sizer.size if sizer is not None else post_batchsize):
+                    yield buffer, n_lines
+                    buffer = []
+    yield buffer, n_lines
+
+
+def describe_progress(stage: str, progress: tqdm.tqdm | None, pi: int, stats: PartitionStats) -> None:
+    if progress is not None:
+        progress.set_description_str(f'{stage} ({pi:,} | {stats.n_read:,} | {stats.n_posted:,})')
+
+
+def ingest_partition(
+    partition: Path,
+    config: OpenAlexConfig,
+    collection: Collection = Collection.all,
+    post_batchsize: int = 1000,
+    read_batchsize: int = 50000,
+    commit_interval: int = -1,
+    max_retry: int = 10,
+    queue_depth: int = 4,
+    engine: Engine = Engine.pydantic,
+    manifest_file: Path | None = None,
+    http2: bool = False,
+    max_inflight: int = 1,
+    gzip_backend: GzipBackend = GzipBackend.auto,
+    compress_level: int = 0,
+    adaptive: bool = False,
+    target_latency: float = 5.0,
+    shard: Shard | None = None,
+    shard_dir: Path | None = None,
+    spool_dir: Path | None = None,
+    n_uncommited: int = 0,
+    progress: tqdm.tqdm | None = None,
+    pi: int = 0,
+) -> PartitionStats:
+    """Read, translate, and post one works partition to solr.
+
+    This runs as a three-stage pipeline (decompress/decode -> translate -> upload) joined by bounded queues,
+    so gzip reading, translation and network I/O overlap and memory is bounded by `queue_depth`:
+    up to `queue_depth * read_batchsize` raw lines wait for translation (several GB with the defaults and large works),
+    so lower `read_batchsize` rather than `queue_depth` if memory is tight.
+
+    It runs either in the main process (with `progress` for live updates) or in a pool worker,
+    in which case the returned counts are merged into the progress by the parent.
+
+    If a `manifest_file` is given, the number of lines processed is checkpointed after every post
+    and a previously interrupted partition continues after the last checkpoint.
+
+    With `max_inflight > 1`, the upload stage keeps that many update requests open at once;
+    checkpoints still only advance once all earlier batches are done.
+
+    Solr is committed every `commit_interval` documents, counting on from the `n_uncommited` documents earlier partitions
+    posted since the last commit; the returned stats carry the new count on to the next partition.
+
+    With `adaptive`, the batch size starts at `post_batchsize` and follows solr's latency (see `AdaptiveBatchSize`).
+
+    With a `shard`, only that line range of the partition is ingested and checkpointed (see `plan_shards`).
+
+    With a `spool_dir`, batches that still fail after `max_retry` attempts are written to a `DeadLetterSpool` there
+    (and counted as failed), so they can be re-posted later with `snapshot replay-failed`.
+    """
+    stats = PartitionStats(partition=str(shard or partition), n_uncommited=n_uncommited)
+    client = get_solr_client(config, http2=http2, compress_level=compress_level)
+    sizer = AdaptiveBatchSize(post_batchsize, target_latency=target_latency, name=name_part(partition)) if adaptive else None
+    spool = DeadLetterSpool(spool_dir, name=name_part(partition), url=update_url(config)) if spool_dir is not None else None
+
+    manifest = Manifest(manifest_file) if manifest_file is not None else None
+    state = manifest.current(partition, shard=shard) if manifest is not None else None
+    if state is not None and state.completed:
+        manifest.close()
+        return stats
+    n_skip = state.n_lines if state is not None else 0
+    n_posted = state.n_posted if state is not None else 0
+    n_failed = state.n_failed if state is not None else 0
+    if n_skip > 0:
+        logging.info(f'Resuming {shard or partition} after line {n_skip:,}')
+    describe = partial(describe_progress, progress=progress, pi=pi, stats=stats)
+
+    def read() -> Generator[list[bytes], None, None]:
+        lines = read_shard(shard, index_dir=shard_dir, backend=gzip_backend) if shard is not None else read_lines(partition, backend=gzip_backend)
+        yield from batched(islice(lines, n_skip, None), batch_size=read_batchsize)
+
+    def posted(post_works: list[bytes], n_lines: int, failed: FailedPieces) -> None:
+        n_failed_ = sum(len(docs) for docs, _ in failed)
+        stats.n_uncommited += len(post_works)
+        stats.n_posted += len(post_works) - n_failed_
+        stats.n_failed += n_failed_
+        for docs, error in failed:
+            if spool is not None:
+                spool.add(docs, source=str(shard or partition), error=error)
+
+        if manifest is not None:
+            manifest.update(partition, n_lines=n_lines, n_posted=n_posted + stats.n_posted, n_failed=n_failed + stats.n_failed, shard=shard)
+
+        if (commit_interval > 0) and (stats.n_uncommited >= commit_interval):
+            commit(config, client=client)
+            stats.n_uncommited = 0
+
+    describe('READ')
+    translate = partial(translate_lines, engine=engine, collection=collection, post_batchsize=post_batchsize, n_lines=n_skip, stats=stats, sizer=sizer)
+    batches = staged(read(), translate, queue_depth=queue_depth)
+    if max_inflight > 1:
+        describe('POST')
+        post = partial(post_concurrently, max_inflight=max_inflight, max_retry=max_retry, http2=http2, compress_level=compress_level, sizer=sizer)
+        asyncio.run(post(batches, config, on_posted=posted))
+    else:
+        post_sequentially(batches, config, on_posted=posted, max_retry=max_retry, client=client, describe=describe, sizer=sizer)
+
+    if manifest is not None:
+        manifest.update(
+            partition,
+            n_lines=n_skip + stats.n_read,
+            n_posted=n_posted + stats.n_posted,
+            n_failed=n_failed + stats.n_failed,
+            completed=True,
+            shard=shard,
+        )
+        manifest.close()
+
+    return stats
+
+
+def setup_ingest(config_file: Path, loglevel: str) -> Settings:
     logging.basicConfig(format='%(asctime)s [%(levelname)s] %(name)s (%(process)d): %(message)s', level=loglevel)
     logging.getLogger('matplotlib').setLevel(logging.WARNING)
     logging.getLogger('urllib3').setLevel(logging.WARNING)
@@ -52,6 +350,200 @@ def update_solr(
         raise AssertionError(f'Config file does not exist at {config_file.resolve()}!')
     config = load_settings(config_file)
     logging.info(f'Will use solr collection at: {config.OPENALEX.solr_url}')
+    return config
+
+
+def plan_shards(
+    partitions: list[Path],
+    pool: ProcessPoolExecutor,
+    shard_size: int,
+    shard_dir: Path,
+    manifest_file: Path | None = None,
+    gzip_backend: GzipBackend = GzipBackend.auto,
+) -> dict[Path, list[Shard]]:
+    """Split partitions larger than `shard_size` bytes into line ranges that workers can ingest independently.
+
+    The line offsets (and, with indexed_gzip, access points into the compressed file) are found by scanning each large
+    partition once in the `pool`, the result is kept in `shard_dir` for later runs. Partitions that were partially ingested
+    as a whole before continue from their checkpoint instead.
+    """
+    manifest = Manifest(manifest_file) if manifest_file is not None else None
+    large = []
+    for partition in partitions:
+        state = manifest.current(partition) if manifest is not None else None
+        if partition.stat().st_size > shard_size and (state is None or state.n_lines == 0):
+            large.append(partition)
+
+    logging.warning(f'Splitting {len(large):,} partitions larger than {shard_size / 1024 / 1024:,.0f}MB into shards.')
+    split = partial(split_partition, index_dir=shard_dir, shard_size=shard_size, backend=gzip_backend)
+    shards = dict(zip(large, pool.map(split, large), strict=True))
+    if manifest is not None:
+        for partition, shards_ in shards.items():
+            manifest.set_shards(partition, shards_)
+        manifest.close()
+    return shards
+
+
+class Schedule(str, Enum):
+    path = 'path'  # in order of the paths (i.e. oldest `updated_date=` first)
+    size = 'size'  # largest first, so big partitions do not end up as stragglers at the end of a parallel run
+
+
+def schedule_units(partitions: list[Path], shards: dict[Path, list[Shard]], schedule: Schedule) -> list[tuple[Path, Shard | None, int]]:
+    """Work units (partitions or shards of them) with their (estimated) compressed size in bytes, in the order they should be processed."""
+    units: list[tuple[Path, Shard | None, int]] = []
+    for partition in partitions:
+        size = partition.stat().st_size
+        if partition not in shards:
+            units.append((partition, None, size))
+            continue
+        # shards are cut by lines, so estimate their share of the compressed size the same way
+        n_lines = max(1, shards[partition][-1].end)
+        units += [(partition, shard, size * shard.end // n_lines - size * shard.start // n_lines) for shard in shards[partition]]
+    if schedule == Schedule.size:
+        units.sort(key=itemgetter(2), reverse=True)
+    return units
+
+
+def ingest_partitions(
+    partitions: list[Path],
+    config: OpenAlexConfig,
+    workers: int = 1,
+    commit_interval: int = -1,
+    shard_size: int = 0,
+    shard_dir: Path | None = None,
+    schedule: Schedule = Schedule.size,
+    **options: Any,
+) -> PartitionStats:
+    """Ingest all `partitions` either one by one or in a pool of `workers` processes (see `ingest_partition` for `options`).
+    In the pool, partitions larger than `shard_size` bytes are split into shards (see `plan_shards`).
+    Progress and ETA are tracked in compressed bytes rather than partitions, as partition sizes vary a lot.
+    Returns the summed up counts across all partitions.
+    """
+    progress = tqdm.tqdm(total=sum(partition.stat().st_size for partition in partitions), unit='B', unit_scale=True, unit_divisor=1024)
+
+    n_read = 0
+    n_total = 0
+    n_failed = 0
+    n_uncommited = 0
+
+    def collect(stats: PartitionStats, n_bytes: int) -> None:
+        nonlocal n_read, n_total, n_failed
+        n_read += stats.n_read
+        n_total += stats.n_posted
+        n_failed += stats.n_failed
+        progress.update(n_bytes)
+        elapsed = progress.format_dict['elapsed']
+        progress.set_postfix_str(
+            f'read={n_read:,}, total={n_total:,}, failed={n_failed:,}, docs/s={n_read / max(elapsed, 1e-3):,.0f}, '
+            f'partition={"/".join(Path(stats.partition).parts[-2:])}',
+        )
+
+    if workers <= 1:
+        for pi, (partition, _, n_bytes) in enumerate(schedule_units(partitions, {}, schedule), 1):
+            progress.set_postfix_str(
+                f'total={n_total:,}, failed={n_failed:,}, filesize={n_bytes / 1024 / 1024 / 1024:,.2f}GB, partition={"/".join(partition.parts[-2:])}',
+            )
+            stats = ingest_partition(
+                partition=partition, config=config, **options, commit_interval=commit_interval, n_uncommited=n_uncommited, progress=progress, pi=pi
+            )
+            n_uncommited = stats.n_uncommited
+            collect(stats, n_bytes)
+    else:
+        logging.warning(f'Ingesting partitions with {workers} worker processes.')
+        progress.set_description_str(f'POOL ({workers} workers)')
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards: dict[Path, list[Shard]] = {}
+            if shard_size > 0 and shard_dir is not None:
+                shards = plan_shards(partitions, pool, shard_size, shard_dir, options.get('manifest_file'), options.get('gzip_backend', GzipBackend.auto))
+            # Workers never commit themselves; we commit here based on the merged counts.
+            submit = partial(pool.submit, ingest_partition, config=config, **options, shard_dir=shard_dir, commit_interval=-1)
+            futures = {
+                submit(partition=partition, shard=shard): (shard or partition, n_bytes)
+                for partition, shard, n_bytes in schedule_units(partitions, shards, schedule)
+            }
+            for future in as_completed(futures):
+                unit, n_bytes = futures[future]
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    logging.error(f'Failed to ingest partition {unit}: {e}')
+                    logging.exception(e)
+                    stats = PartitionStats(partition=str(unit))
+                collect(stats, n_bytes)
+
+                n_uncommited += stats.n_posted
+                if (commit_interval > 0) and (n_uncommited >= commit_interval):
+                    commit(config)
+                    n_uncommited = 0
+
+        if len(shards) > 0 and options.get('manifest_file') is not None:
+            manifest = Manifest(options['manifest_file'])
+            for partition, shards_ in shards.items():
+                manifest.merge_shards(partition, shards_)
+            manifest.close()
+
+    progress.close()
+    commit(config)
+
+    return PartitionStats(partition='all', n_read=n_read, n_posted=n_total, n_failed=n_failed)
+
+
+def log_spooled(stats: PartitionStats, spool_dir: Path) -> None:
+    if stats.n_failed > 0:
+        logging.warning(f'Failed batches were written to {spool_dir}, re-post them with `snapshot replay-failed --spool-dir={spool_dir}`')
+
+
+# Options shared by `update_solr` and `diff_ingest` (snapshot/diff.py)
+SnapshotOpt = Annotated[Path, typer.Option(help='Path to openalex snapshot from S3')]
+ConfigFileOpt = Annotated[Path, typer.Option(help='Path to config file')]
+PostBatchsizeOpt = Annotated[int, typer.Option(help='Number of documents per update request')]
+ReadBatchsizeOpt = Annotated[int, typer.Option(help='Lines the reader hands to the translate stage at once (queue_depth x this many are buffered)')]
+CommitIntervalOpt = Annotated[int, typer.Option(help='Commit after this many documents (-1 = only at the end)')]
+MaxRetryOpt = Annotated[int, typer.Option(help='Attempts per batch before it counts as failed')]
+CollectionOpt = Annotated[Collection, typer.Option(help='Which collection to filter')]
+WorkersOpt = Annotated[int, typer.Option(help='Number of processes to ingest partitions in parallel (1 = no pool)')]
+QueueDepthOpt = Annotated[int, typer.Option(help='Number of batches buffered between read, translate, and upload stages')]
+EngineOpt = Annotated[Engine, typer.Option(help='Which parser and translator to use for works')]
+Http2Opt = Annotated[bool, typer.Option(help='Talk to solr via HTTP/2 (requires `h2`)')]
+MaxInflightOpt = Annotated[int, typer.Option(help='Number of update requests to keep open at once per partition (1 = sequential)')]
+GzipBackendOpt = Annotated[GzipBackend, typer.Option(help='Decompression backend for partitions')]
+CompressLevelOpt = Annotated[int, typer.Option(help='gzip level to compress update requests with (0 = off, solr must accept gzip)')]
+AdaptiveOpt = Annotated[bool, typer.Option(help='Adapt --post-batchsize to solr latency and errors while ingesting')]
+TargetLatencyOpt = Annotated[float, typer.Option(help='Seconds per update request the adaptive batch size aims for')]
+ShardSizeOpt = Annotated[int, typer.Option(help='With --workers > 1, split partitions larger than this many MB into shards (0 = off)')]
+ScheduleOpt = Annotated[Schedule, typer.Option(help='Order in which partitions are ingested')]
+SpoolDirOpt = Annotated[Path | None, typer.Option(help='Where to keep batches that failed to post (default: next to the manifest)')]
+LoglevelOpt = Annotated[str, typer.Option(help='Log level')]
+
+
+def update_solr(
+    snapshot: SnapshotOpt,
+    config_file: ConfigFileOpt,
+    skip_n_partitions: Annotated[int, typer.Option(help='')] = 0,
+    filter_since: Annotated[str, typer.Option(help='')] = '2000-01-01',
+    post_batchsize: PostBatchsizeOpt = 1000,
+    read_batchsize: ReadBatchsizeOpt = 50000,
+    commit_interval: CommitIntervalOpt = -1,
+    max_retry: MaxRetryOpt = 10,
+    collection: CollectionOpt = Collection.all,
+    workers: WorkersOpt = 1,
+    queue_depth: QueueDepthOpt = 4,
+    engine: EngineOpt = Engine.pydantic,
+    manifest_file: Annotated[Path | None, typer.Option(help='SQLite file to checkpoint progress in (default: in snapshot folder)')] = None,
+    resume: Annotated[bool, typer.Option(help='Continue where the last run stopped according to the manifest')] = False,
+    http2: Http2Opt = False,
+    max_inflight: MaxInflightOpt = 1,
+    gzip_backend: GzipBackendOpt = GzipBackend.auto,
+    compress_level: CompressLevelOpt = 0,
+    adaptive: AdaptiveOpt = False,
+    target_latency: TargetLatencyOpt = 5.0,
+    shard_size: ShardSizeOpt = 0,
+    schedule: ScheduleOpt = Schedule.size,
+    spool_dir: SpoolDirOpt = None,
+    loglevel: LoglevelOpt = 'INFO',
+) -> None:
+    config = setup_ingest(config_file=config_file, loglevel=loglevel)
 
     logging.info(
         'Please ensure you synced the snapshot via\n   $  aws s3 sync "s3://openalex/data" "data" --no-sign-request --delete',
@@ -64,76 +556,46 @@ def update_solr(
     partitions = partitions[skip_n_partitions:]
     logging.info(f'Looks like there are {len(partitions):,} partitions after skipping the next {skip_n_partitions}.')
 
-    logging.getLogger('root').setLevel(logging.WARNING)
-
-    progress = tqdm.tqdm(total=len(partitions))
+    manifest_file = manifest_file or (snapshot / 'ingest-manifest.sqlite3')
+    spool_dir = spool_dir or manifest_file.with_name(f'{manifest_file.stem}-failed')
+    manifest = Manifest(manifest_file)
+    if resume:
+        states = {path: state for path, state in manifest.states().items() if state.completed}
+        partitions = [p for p in partitions if str(p) not in states or manifest.current(p) is None]
+        logging.info(f'Looks like there are {len(partitions):,} partitions left to process according to the manifest at {manifest_file}.')
+    else:
+        logging.info(f'Resetting progress for these partitions in the manifest at {manifest_file}.')
+        manifest.reset(partitions)
+    manifest.close()
 
-    n_total = 0
-    n_failed = 0
-    n_uncommited = 0
+    logging.getLogger('root').setLevel(logging.WARNING)
 
-    for pi, partition in enumerate(partitions, 1):
-        progress.set_postfix_str(
-            f'total={n_total:,}, '
-            f'failed={n_failed:,}, '
-            f'filesize={partition.stat().st_size / 1024 / 1024 / 1024:,.2f}GB, '
-            f'partition={"/".join(partition.parts[-2:])}',
-        )
+    stats = ingest_partitions(
+        partitions=partitions,
+        config=config.OPENALEX,
+        workers=workers,
+        commit_interval=commit_interval,
+        shard_size=shard_size * 1024 * 1024,
+        shard_dir=manifest_file.with_name(f'{manifest_file.stem}-shards'),
+        schedule=schedule,
+        collection=collection,
+        post_batchsize=post_batchsize,
+        read_batchsize=read_batchsize,
+        max_retry=max_retry,
+        queue_depth=queue_depth,
+        engine=engine,
+        manifest_file=manifest_file,
+        http2=http2,
+        max_inflight=max_inflight,
+        gzip_backend=gzip_backend,
+        compress_level=compress_level,
+        adaptive=adaptive,
+        target_latency=target_latency,
+        spool_dir=spool_dir,
+    )
 
-        with gzip.open(partition, 'rb') as f_in:
-            n_read = 0
-            n_posted = 0
-            progress.set_description_str(f'READ ({pi:,} | -- | --)')
-
-            for _bi, batch in enumerate(batched(f_in, batch_size=read_batchsize)):
-                works = [WorksSchema.model_validate(json.loads(line)) for line in batch]
-                n_read += len(works)
-                works = [
-                    json.dumps(translate_work_to_solr(work, source='OpenAlex', authorship_limit=50))
-                    for work in works
-                    if (
-                        collection == Collection.all or (collection == Collection.base and not work.is_xpac) or (collection == Collection.xpac and work.is_xpac)
-                    )
-                ]
-                n_total += len(works)
-                n_uncommited += len(works)
-
-                progress.set_description_str(f'POST ({pi:,} | {n_read:,} | {n_posted:,})')
-
-                for post_works in batched(works, batch_size=post_batchsize):
-                    for retry in range(max_retry):
-                        try:
-                            res = httpx.post(
-                                f'{config.OPENALEX.SOLR_ENDPOINT}/api/collections/{config.OPENALEX.SOLR_COLLECTION}/update/json',  # ?overwrite=true',
-                                data=b'\n'.join(post_works).decode(),
-                                auth=config.OPENALEX.auth,
-                                timeout=240,
-                                headers={'Content-Type': 'application/json'},
-                            )
-                            res.raise_for_status()
-                            n_posted += len(post_works)
-                            progress.set_description_str(f'POST ({pi:,} | {n_read:,} | {n_posted:,})')
-                            break
-                        except (Exception, httpx.WriteTimeout, httpx.ReadTimeout, httpx.HTTPError, httpx.HTTPStatusError) as e:
-                            if retry < (max_retry - 1):
-                                logging.error(e)
-                                logging.warning(f'Will try again in {retry * 60} seconds...')
-                                sleep(retry * 60)
-                            else:
-                                n_failed += len(post_works)
-                                # raise e
-
-                    if (commit_interval > 0) and (n_uncommited >= commit_interval):
-                        commit(config.OPENALEX)
-                        n_uncommited = 0
-
-                progress.set_description_str(f'READ ({pi:,} | {n_read:,} | {n_posted:,})')
-
-        progress.update()
-
-    commit(config.OPENALEX)
-
-    logging.info('Finished loading partitions!')
+    logging.info(f'Finished loading partitions! Read {stats.n_read:,} works, posted {stats.n_posted:,}, failed to post {stats.n_failed:,}.')
+    log_spooled(stats, spool_dir)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,170 @@
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+
+from msgspec import Struct
+
+from openalex_ingest.snapshot.shards import Shard
+
+logger = logging.getLogger('openalex.snapshot.manifest')
+
+
+class PartitionState(Struct):
+    path: str
+    size: int
+    mtime: float
+    n_lines: int = 0  # number of lines (from the start of the file) that were fully processed
+    n_posted: int = 0
+    n_failed: int = 0
+    completed: bool = False
+    time_updated: str | None = None
+
+
+class Manifest:
+    """Crash-safe record of ingest progress per partition, kept in a small SQLite file.
+
+    Every process (including pool workers) opens its own connection; SQLite's WAL journal makes
+    concurrent writes from multiple workers safe. A partition's state is only considered valid if
+    size and mtime on disk still match, otherwise it is treated as new.
+
+    Large partitions may be split into shards (line ranges) that are ingested independently; their progress
+    is kept in a separate table and merged into the partition once all shards are completed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=120)
+        self.connection.execute('PRAGMA journal_mode=WAL;')
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS partition
+            (
+                path         TEXT PRIMARY KEY,
+                size         INTEGER NOT NULL,
+                mtime        REAL    NOT NULL,
+                n_lines      INTEGER NOT NULL DEFAULT 0,
+                n_posted     INTEGER NOT NULL DEFAULT 0,
+                n_failed     INTEGER NOT NULL DEFAULT 0,
+                completed    INTEGER NOT NULL DEFAULT 0,
+                time_updated TEXT
+            );
+            """,
+        )
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS shard
+            (
+                path         TEXT    NOT NULL,
+                line_start   INTEGER NOT NULL,
+                line_end     INTEGER NOT NULL,
+                size         INTEGER NOT NULL,
+                mtime        REAL    NOT NULL,
+                n_lines      INTEGER NOT NULL DEFAULT 0,
+                n_posted     INTEGER NOT NULL DEFAULT 0,
+                n_failed     INTEGER NOT NULL DEFAULT 0,
+                completed    INTEGER NOT NULL DEFAULT 0,
+                time_updated TEXT,
+                PRIMARY KEY (path, line_start, line_end)
+            );
+            """,
+        )
+        self.connection.commit()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def get(self, partition: Path, shard: Shard | None = None) -> PartitionState | None:
+        if shard is not None:
+            row = self.connection.execute(
+                'SELECT path, size, mtime, n_lines, n_posted, n_failed, completed, time_updated FROM shard WHERE path = ? AND line_start = ? AND line_end = ?;',
+                (str(partition), shard.start, shard.end),
+            ).fetchone()
+        else:
+            row = self.connection.execute(
+                'SELECT path, size, mtime, n_lines, n_posted, n_failed, completed, time_updated FROM partition WHERE path = ?;',
+                (str(partition),),
+            ).fetchone()
+        if row is None:
+            return None
+        return PartitionState(*row[:6], completed=bool(row[6]), time_updated=row[7])
+
+    def states(self) -> dict[str, PartitionState]:
+        rows = self.connection.execute('SELECT path, size, mtime, n_lines, n_posted, n_failed, completed, time_updated FROM partition;')
+        return {row[0]: PartitionState(*row[:6], completed=bool(row[6]), time_updated=row[7]) for row in rows}
+
+    def current(self, partition: Path, shard: Shard | None = None) -> PartitionState | None:
+        """Return the recorded state for this partition (or shard of it) if the file on disk is unchanged since then."""
+        state = self.get(partition, shard=shard)
+        if state is None:
+            return None
+        stat = partition.stat()
+        if state.size != stat.st_size or state.mtime != stat.st_mtime:
+            logger.debug(f'Partition {partition} changed on disk since it was last recorded, ignoring previous state.')
+            return None
+        return state
+
+    def update(self, partition: Path, n_lines: int, n_posted: int, n_failed: int, completed: bool = False, shard: Shard | None = None) -> None:
+        stat = partition.stat()
+        if shard is not None:
+            self.connection.execute(
+                """
+                INSERT INTO shard (path, line_start, line_end, size, mtime, n_lines, n_posted, n_failed, completed, time_updated)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (path, line_start, line_end) DO UPDATE SET size         = excluded.size,
+                                                                       mtime        = excluded.mtime,
+                                                                       n_lines      = excluded.n_lines,
+                                                                       n_posted     = excluded.n_posted,
+                                                                       n_failed     = excluded.n_failed,
+                                                                       completed    = excluded.completed,
+                                                                       time_updated = excluded.time_updated;
+                """,
+                (str(partition), shard.start, shard.end, stat.st_size, stat.st_mtime, n_lines, n_posted, n_failed, int(completed), datetime.now().isoformat()),
+            )
+            self.connection.commit()
+            return
+        self.connection.execute(
+            """
+            INSERT INTO partition (path, size, mtime, n_lines, n_posted, n_failed, completed, time_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (path) DO UPDATE SET size         = excluded.size,
+                                             mtime        = excluded.mtime,
+                                             n_lines      = excluded.n_lines,
+                                             n_posted     = excluded.n_posted,
+                                             n_failed     = excluded.n_failed,
+                                             completed    = excluded.completed,
+                                             time_updated = excluded.time_updated;
+            """,
+            (str(partition), stat.st_size, stat.st_mtime, n_lines, n_posted, n_failed, int(completed), datetime.now().isoformat()),
+        )
+        self.connection.commit()
+
+    def reset(self, partitions: list[Path]) -> None:
+        self.connection.executemany('DELETE FROM partition WHERE path = ?;', [(str(partition),) for partition in partitions])
+        self.connection.executemany('DELETE FROM shard WHERE path = ?;', [(str(partition),) for partition in partitions])
+        self.connection.commit()
+
+    def set_shards(self, partition: Path, shards: list[Shard]) -> None:
+        """Forget the progress of shards from a previous split with different boundaries."""
+        rows = self.connection.execute('SELECT line_start, line_end FROM shard WHERE path = ?;', (str(partition),)).fetchall()
+        bounds = {(shard.start, shard.end) for shard in shards}
+        self.connection.executemany(
+            'DELETE FROM shard WHERE path = ? AND line_start = ? AND line_end = ?;',
+            [(str(partition), start, end) for start, end in rows if (start, end) not in bounds],
+        )
+        self.connection.commit()
+
+    def merge_shards(self, partition: Path, shards: list[Shard]) -> bool:
+        """Mark the partition as completed if all its shards are, returns whether that is the case."""
+        states = [self.current(partition, shard=shard) for shard in shards]
+        done = [state for state in states if state is not None and state.completed]
+        if len(done) < len(shards):
+            return False
+        self.update(
+            partition,
+            n_lines=sum(state.n_lines for state in done),
+            n_posted=sum(state.n_posted for state in done),
+            n_failed=sum(state.n_failed for state in done),
+            completed=True,
+        )
+        return True
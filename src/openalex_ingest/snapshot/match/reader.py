@@ -1,42 +1,93 @@
-import gzip
 import logging
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from itertools import batched
+from multiprocessing import Manager
 from pathlib import Path
-from typing import Generator
+from queue import Empty, Queue
+from typing import Generator, Iterator
 
-from msgspec import DecodeError
 from msgspec.json import Decoder
-from nacsos_data.models.openalex import strip_url, invert_abstract
+from nacsos_data.models.openalex import strip_url
 from tqdm import tqdm
 
+from openalex_ingest.shared.decompress import read_lines
 from openalex_ingest.shared.util import get_logger
-from openalex_ingest.snapshot.match.structs import Work
+from openalex_ingest.snapshot.match.structs import NULL, WorkAbstract, WorkPresence
+from openalex_ingest.snapshot.shards import Shard, read_shard, split_partition
+from openalex_ingest.snapshot.translate import reconstruct_abstract
 
 
-def read_partition(in_file: str | Path, logger: logging.Logger) -> Generator[tuple[str, str | None], None, None]:
-    decoder_work = Decoder(Work)
+def _read_lines(in_file: str | Path, shard: Shard | None = None, shard_dir: Path | None = None) -> Iterator[bytes]:
+    if shard is not None:
+        return tqdm(read_shard(shard, index_dir=shard_dir), desc=f'Processing shard {shard}', total=shard.end - shard.start)
+    return tqdm(read_lines(in_file), desc=f'Processing partition {in_file}')
 
-    with gzip.open(in_file, 'rb') as f_in:
-        for li, line in tqdm(enumerate(f_in), desc=f'Processing partition {in_file}'):
-            try:
-                work = decoder_work.decode(line)
-            except Exception as e:
-                logger.warning(line)
-                logger.exception(e)
-            openalex_id = strip_url(work.id)
 
-            abstract = None
-            if work.abstract_inverted_index is not None:
-                try:
-                    abstract = invert_abstract(work.abstract_inverted_index)
-                    if len(abstract.strip()) < 1:
-                        abstract = None
-                except DecodeError:
-                    logger.warning(f'Failed to read abstract for {openalex_id} (line {li:,}) in {in_file}')
-                    abstract = None
-            yield openalex_id, abstract
+def read_partition(
+    in_file: str | Path,
+    logger: logging.Logger,
+    shard: Shard | None = None,
+    shard_dir: Path | None = None,
+) -> Generator[tuple[str, str | None], None, None]:
+    decoder_work = Decoder(WorkAbstract)
+
+    for line in _read_lines(in_file, shard=shard, shard_dir=shard_dir):
+        try:
+            work = decoder_work.decode(line)
+        except Exception as e:
+            logger.warning(line)
+            logger.exception(e)
+            continue
+        openalex_id = strip_url(work.id)
+
+        abstract = None
+        if work.abstract_inverted_index is not None:
+            abstract = reconstruct_abstract(work.abstract_inverted_index)
+            if len(abstract.strip()) < 1:
+                abstract = None
+        yield openalex_id, abstract
+
+
+def read_partition_ids(
+    in_file: str | Path,
+    logger: logging.Logger,
+    shard: Shard | None = None,
+    shard_dir: Path | None = None,
+) -> Generator[tuple[str, bytes | None], None, None]:
+    """First phase of a two-phase read: only decode the ID and keep `abstract_inverted_index` as raw JSON (`None` if missing).
+    Use `decode_abstract` as the second phase once it is clear which abstracts are actually needed.
+    """
+    decoder_work = Decoder(WorkPresence)
+
+    for line in _read_lines(in_file, shard=shard, shard_dir=shard_dir):
+        try:
+            work = decoder_work.decode(line)
+        except Exception as e:
+            logger.warning(line)
+            logger.exception(e)
+            continue
+        yield strip_url(work.id), bytes(work.abstract_inverted_index) if work.abstract_inverted_index != NULL else None
+
 
+_decoder_inverted_index = Decoder(dict[str, list[int]])
 
-def read_partitions(snapshot: Path, logger: logging.Logger, seen_file: Path) -> Generator[tuple[str, str | None], None, None]:
+
+def decode_abstract(raw_inverted_index: bytes) -> str | None:
+    """Second phase of a two-phase read (see `read_partition_ids`)."""
+    abstract = reconstruct_abstract(_decoder_inverted_index.decode(raw_inverted_index))
+    return abstract if len(abstract.strip()) > 0 else None
+
+
+def read_partitions(
+    snapshot: Path,
+    logger: logging.Logger,
+    seen_file: Path,
+    two_phase: bool = False,
+) -> Generator[tuple[str, str | bytes | None], None, None]:
+    """Read all partitions that are not listed in `seen_file` yet.
+    With `two_phase`, abstracts are yielded as raw inverted index (see `read_partition_ids`).
+    """
     works_files = set(snapshot.glob(f'works/**/*.gz'))
     if seen_file is not None and seen_file.exists():
         with open(seen_file, 'r') as seen_f:
@@ -47,10 +98,110 @@ def read_partitions(snapshot: Path, logger: logging.Logger, seen_file: Path) ->
     with open(seen_file, 'a') as seen_f:
         for fi, work_file in enumerate(sorted(works_files)):
             logger.info(f'Reading {fi:,}/{len(works_files):,} works partition: {work_file}')
-            yield from read_partition(work_file, logger)
+            yield from (read_partition_ids if two_phase else read_partition)(work_file, logger)
             seen_f.write(f'{work_file}\n')
 
 
+def _read_partition_to_queue(
+    partition: Path,
+    queue: Queue,
+    batch_size: int,
+    two_phase: bool,
+    shard: Shard | None = None,
+    shard_dir: Path | None = None,
+) -> None:
+    logger = logging.getLogger('openalex.snapshot.reader')
+    try:
+        works = (read_partition_ids if two_phase else read_partition)(partition, logger, shard=shard, shard_dir=shard_dir)
+        for batch in batched(works, batch_size, strict=False):
+            queue.put(('batch', partition, list(batch)))
+        queue.put(('done', partition, None))
+    except Exception as e:
+        logger.exception(e)
+        queue.put(('failed', partition, repr(e)))
+
+
+def _check_readers(futures: list[Future]) -> None:
+    """Raise if a reader process died; errors while reading a partition are reported through the queue instead."""
+    for future in futures:
+        if future.done() and future.exception() is not None:
+            raise RuntimeError(f'A reader process died, giving up: {future.exception()!r}') from future.exception()
+
+
+def read_partitions_parallel(
+    snapshot: Path,
+    logger: logging.Logger,
+    seen_file: Path,
+    workers: int = 4,
+    batch_size: int = 10000,
+    two_phase: bool = False,
+    shard_size: int = 0,
+    poll_seconds: float = 60,
+) -> Generator[list[tuple[str, str | bytes | None]], None, None]:
+    """Like `read_partitions`, but partitions are read by a pool of `workers` processes.
+
+    Yields batches of `(openalex_id, abstract)` in order of completion, so batches of different partitions are interleaved.
+    A partition is only added to the `seen_file` after all of its batches were consumed; failed partitions are logged and
+    not marked as seen, so they are picked up again on the next run.
+
+    Partitions larger than `shard_size` bytes are split into shards that are read by several workers at once
+    (the line offsets for that are kept next to the `seen_file`, see `split_partition`).
+
+    If a worker process dies (e.g. killed for running out of memory), it never reports back; the workers are checked
+    whenever nothing arrived for `poll_seconds`, and a `RuntimeError` is raised instead of waiting forever.
+    """
+    works_files = set(snapshot.glob('works/**/*.gz'))
+    if seen_file is not None and seen_file.exists():
+        with open(seen_file, 'r') as seen_f:
+            works_files -= {Path(line.strip()) for line in seen_f}
+
+    logger.info(f'Found there are {len(works_files)} works partitions, reading them with {workers} processes.')
+    shard_dir = seen_file.with_name(f'{seen_file.stem}-shards')
+    with Manager() as manager, open(seen_file, 'a') as seen_f:
+        # bounded, so workers pause while the consumer is busy instead of piling up decoded partitions in memory
+        queue = manager.Queue(maxsize=workers * 4)
+        pool = ProcessPoolExecutor(max_workers=workers)
+        try:
+            large = [work_file for work_file in sorted(works_files) if shard_size > 0 and work_file.stat().st_size > shard_size]
+            split = partial(split_partition, index_dir=shard_dir, shard_size=shard_size)
+            shards: dict[Path, list[Shard | None]] = dict(zip(large, pool.map(split, large), strict=True))
+            if len(large) > 0:
+                logger.info(f'Split {len(large):,} partitions into {sum(len(shards_) for shards_ in shards.values()):,} shards.')
+
+            remaining: dict[Path, int] = {}
+            futures: list[Future] = []
+            for work_file in sorted(works_files):
+                remaining[work_file] = len(shards.get(work_file, [None]))
+                for shard in shards.get(work_file, [None]):
+                    futures.append(pool.submit(_read_partition_to_queue, work_file, queue, batch_size, two_phase, shard=shard, shard_dir=shard_dir))
+
+            n_finished = 0
+            failed: set[Path] = set()
+            while len(remaining) > 0:
+                try:
+                    kind, work_file, payload = queue.get(timeout=poll_seconds)
+                except Empty:
+                    _check_readers(futures)
+                    continue
+                if kind == 'batch':
+                    yield payload
+                    continue
+                if kind == 'failed':
+                    logger.error(f'Failed to read (a shard of) {work_file}: {payload}')
+                    failed.add(work_file)
+                remaining[work_file] -= 1
+                if remaining[work_file] > 0:
+                    continue
+                del remaining[work_file]
+                n_finished += 1
+                if work_file not in failed:
+                    seen_f.write(f'{work_file}\n')
+                    seen_f.flush()
+                    logger.info(f'Finished {n_finished:,}/{len(works_files):,} works partitions: {work_file}')
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
 if __name__ == '__main__':
     logger_ = get_logger('reader', run_log_init=True)
     nw, na = 0, 0
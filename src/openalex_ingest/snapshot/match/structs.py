@@ -1,6 +1,6 @@
 from typing import Literal
 
-from msgspec import Struct
+from msgspec import Raw, Struct
 
 
 class InvertedAbstract(Struct):
@@ -109,51 +109,83 @@ class OpenAccess(Struct, omit_defaults=True, kw_only=True):
     oa_url: str | None = None
 
 
+# msgspec can't decode `Raw | None`, so absent nested fields default to a raw JSON `null`
+NULL = Raw(b'null')
+
+
+class HasContent(Struct, omit_defaults=True, kw_only=True):
+    pdf: bool | None = None
+    grobid_xml: bool | None = None
+
+
+class WorkAbstract(Struct, kw_only=True, omit_defaults=True):
+    """Minimal view of a work for when we are only interested in abstracts (everything else is skipped while decoding)."""
+
+    abstract_inverted_index: dict[str, list[int]] | None = None
+    id: str | None = None
+    title: str | None = None
+
+
+class WorkPresence(Struct, kw_only=True, omit_defaults=True):
+    """Only the ID and whether there is an abstract; the inverted index is kept as raw JSON and never decoded."""
+
+    abstract_inverted_index: Raw = NULL
+    id: str | None = None
+
+
 class Work(Struct, kw_only=True, omit_defaults=True):
+    """Complete view of a work with everything we write to solr.
+    Nested objects we only pass on to solr as JSON are kept as `Raw`, so they are never decoded.
+    """
+
     abstract_inverted_index: dict[str, list[int]] | None = None
-    # authorships: list[Authorship] | None = None
+    authorships: list[Raw] | None = None
     # apc_list
     # apc_paid
     # best_oa_location
     # biblio: Biblio | None = None
     # cited_by_api_url
-    # cited_by_count: int | None = None
-    # concepts
+    cited_by_count: int | None = None
+    concepts: Raw = NULL
     # corresponding_author_ids
     # corresponding_institution_ids
     # countries_distinct_count: int | None = None
     # counts_by_year
-    # created_date: str | None = None
-    # display_name: str | None = None
-    # doi: str | None = None
+    created_date: str | None = None
+    display_name: str | None = None
+    doi: str | None = None
     # fulltext_origin: str | None = None
-    # grants
-    # has_fulltext: bool | None = None
-    # indexed_in
+    fwci: float | None = None
+    funders: Raw = NULL
+    grants: Raw = NULL
+    awards: Raw = NULL
+    has_content: HasContent | None = None
+    has_fulltext: bool | None = None
     id: str | None = None
-    # ids: WorkIds | None = None
-    # indexed_in: list[str] | None = None
+    ids: WorkIds | None = None
+    indexed_in: Raw = NULL
     # institutions_distinct_count: int | None = None
     # is_authors_truncated: bool | None = None
-    # is_oa: bool | None = None
-    # is_paratext: bool | None = None
-    # is_retracted: bool | None = None
-    # language: str | None = None
+    is_paratext: bool | None = None
+    is_retracted: bool | None = None
+    is_xpac: bool | None = None
+    keywords: Raw = NULL
+    language: str | None = None
     # license
-    # locations: list[Location] | None = None
+    locations: Raw = NULL
     # locations_count
     # mesh
     # ngrams_url
-    # open_access: OpenAccess | None = None
-    # primary_location: Location | None = None
+    open_access: OpenAccess | None = None
+    primary_location: Location | None = None
     # primary_topic
-    # publication_date: str | None = None
-    # publication_year: int | None = None
-    # referenced_works: list[str] | None = None
+    publication_date: str | None = None
+    publication_year: int | None = None
+    referenced_works: Raw = NULL
     # related_works
-    # sustainable_development_goals
+    sustainable_development_goals: Raw = NULL
     title: str | None = None
-    # topics: list[Topic] | None = None
-    # type: str | None = None
-    # type_crossref
-    # updated_date: str | None = None
+    topics: Raw = NULL
+    type: str | None = None
+    type_crossref: str | None = None
+    updated_date: str | None = None
@@ -1,17 +1,17 @@
-import json
 from datetime import datetime
-from itertools import batched
+from itertools import batched, chain
 from pathlib import Path
 from typing import Annotated
 
-import httpx
 import typer
+import orjson as json
 from nacsos_data.models.openalex import title_abstract
 
 from openalex_ingest.shared.schema import Request
-from openalex_ingest.shared.solr import check_openalex_ids
+from openalex_ingest.shared.solr import JsonBody, check_openalex_ids_with_abstract, get_solr_client
 from openalex_ingest.shared.util import prepare_runner
-from openalex_ingest.snapshot.match.reader import read_partitions
+from openalex_ingest.snapshot.idindex import IdIndex
+from openalex_ingest.snapshot.match.reader import decode_abstract, read_partitions, read_partitions_parallel
 
 
 def main(
@@ -19,6 +19,9 @@ def main(
     processed_partitions: Annotated[Path, typer.Option(help='Path to memory file to keep track of which partitions are already processed')],
     config: Annotated[Path, typer.Option(help='Path to config file')],
     batch_size: int = 500,
+    id_index: Annotated[Path | None, typer.Option(help='Local ID index (see `snapshot id-index`) to skip works known to have an abstract')] = None,
+    workers: Annotated[int, typer.Option(help='Number of processes reading partitions in parallel (1 = read in this process)')] = 1,
+    shard_size: Annotated[int, typer.Option(help='With --workers > 1, split partitions larger than this many MB into shards (0 = off)')] = 0,
     loglevel: str = 'INFO',
 ):
     logger, settings, db_engine = prepare_runner(config=config, loglevel=loglevel, logger_name='openalex-backup', run_log_init=True)
@@ -26,10 +29,27 @@ def main(
     num_works = 0
     num_works_with_abstract = 0
     num_matched_ids = 0
+    num_index_hits = 0
     num_updated = 0
+    client = get_solr_client(settings.OPENALEX)
+    index = IdIndex(id_index) if id_index is not None else None
+    # Two-phase read: abstracts stay raw JSON until we know solr is missing them
+    if workers > 1:
+        works_it = chain.from_iterable(
+            read_partitions_parallel(
+                snapshot=snapshot,
+                logger=logger,
+                seen_file=processed_partitions,
+                workers=workers,
+                two_phase=True,
+                shard_size=shard_size * 1024 * 1024,
+            ),
+        )
+    else:
+        works_it = read_partitions(snapshot=snapshot, logger=logger, seen_file=processed_partitions, two_phase=True)
     with db_engine.session() as session:
-        for batch in batched(read_partitions(snapshot=snapshot, logger=logger, seen_file=processed_partitions), n=batch_size, strict=False):
-            works = {openalex_id: abstract for openalex_id, abstract in batch if abstract is not None}
+        for batch in batched(works_it, n=batch_size, strict=False):
+            works = {openalex_id: raw_abstract for openalex_id, raw_abstract in batch if raw_abstract is not None}
 
             num_works += len(batch)
             num_works_with_abstract += len(works)
@@ -37,17 +57,29 @@ def main(
             if (num_works % 250000) == 0:
                 logger.info(
                     f'Processed {num_works:,} so far of which {num_works_with_abstract:,} had an abstract '
-                    f'of which {num_matched_ids:,} were found by ID in solr of which {num_updated:,} did not have an abstract in solr',
+                    f'of which {num_matched_ids:,} were found by ID in solr of which {num_updated:,} did not have an abstract in solr'
+                    + (f' ({num_index_hits:,} found in the local ID index)' if index is not None else ''),
                 )
 
             if len(works) == 0:
                 continue
 
-            ids_matched = check_openalex_ids(settings.OPENALEX, list(works.keys()), check_abstract=False)
-            num_matched_ids += len(ids_matched)
+            if index is not None:
+                found, has_abstract = index.lookup(list(works.keys()))
+                num_index_hits += int(found.sum())
+                # Confirm with solr (and get titles), as the index might be outdated; IDs it does not know yet are asked about as well
+                candidates = [openalex_id for openalex_id, missing in zip(works.keys(), ~has_abstract, strict=True) if missing]
+                ids_matched = check_openalex_ids_with_abstract(settings.OPENALEX, candidates, client=client) if len(candidates) > 0 else []
+                # The index is built from solr, so IDs it knows to have an abstract are solr matches as well
+                num_matched_ids += int(has_abstract.sum()) + len(ids_matched)
+                ids_missing_abstract = {doc['id']: doc.get('title') for doc in ids_matched if not doc['has_abstract']}
+            else:
+                ids_matched = check_openalex_ids_with_abstract(settings.OPENALEX, list(works.keys()), client=client)
+                num_matched_ids += len(ids_matched)
+                ids_missing_abstract = {doc['id']: doc.get('title') for doc in ids_matched if not doc['has_abstract']}
 
-            ids_missing_abstract_ = check_openalex_ids(settings.OPENALEX, list(works.keys()))
-            ids_missing_abstract = {doc['id']: doc.get('title') for doc in ids_missing_abstract_}
+            abstracts = {openalex_id: decode_abstract(works[openalex_id]) for openalex_id in ids_missing_abstract.keys()}
+            ids_missing_abstract = {openalex_id: title for openalex_id, title in ids_missing_abstract.items() if abstracts[openalex_id] is not None}
             num_updated += len(ids_missing_abstract)
 
             if len(ids_missing_abstract) == 0:
@@ -58,8 +90,8 @@ def main(
                 {
                     'id': openalex_id,
                     # 'title': {'set': record.title},
-                    'abstract': {'set': works[openalex_id]},
-                    'title_abstract': {'set': title_abstract(title, works[openalex_id])},
+                    'abstract': {'set': abstracts[openalex_id]},
+                    'title_abstract': {'set': title_abstract(title, abstracts[openalex_id])},
                     'abstract_source': {'set': 'OpenAlex_old'},
                     'abstract_date': {'set': timestamp},
                 }
@@ -67,17 +99,10 @@ def main(
             ]
             solarized = False
             try:
-                res = httpx.post(
-                    f'{settings.OPENALEX.solr_url}/update/json?commit=true',
-                    headers={'Content-Type': 'application/json'},
-                    content=json.dumps(updates),
-                    timeout=120,
-                )
-                res.raise_for_status()
+                client.update(JsonBody.array([json.dumps(update) for update in updates]), commit=True, timeout=120)
                 solarized = True
             except Exception as e:
                 logger.error(f'Failed to write to solr: {e}')
-                logger.error(res.text)
                 # raise e
 
             session.add_all(
@@ -85,7 +110,7 @@ def main(
                     Request(
                         wrapper='OpenAlex_old',
                         openalex_id=openalex_id,
-                        abstract=works[openalex_id],
+                        abstract=abstracts[openalex_id],
                         solarized=solarized,
                     )
                     for openalex_id in ids_missing_abstract.keys()
@@ -93,4 +118,8 @@ def main(
             )
             session.commit()
 
-    logger.info(f'Done after processing {num_works:,}  of which {num_works_with_abstract:,} had an abstract of which {num_updated:,} were not in solr')
+    logger.info(
+        f'Done after processing {num_works:,}  of which {num_works_with_abstract:,} had an abstract '
+        f'of which {num_matched_ids:,} were found by ID in solr of which {num_updated:,} did not have an abstract in solr'
+        + (f' ({num_index_hits:,} found in the local ID index)' if index is not None else ''),
+    )
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from openalex_ingest.shared.pipeline import bounded
+from openalex_ingest.shared.solr import AsyncSolrClient, JsonBody, commit
+from openalex_ingest.shared.spool import SPOOL_GLOB, DeadLetterSpool, FailedUpdate, read_spool
+from openalex_ingest.snapshot.load import setup_ingest
+
+logger = logging.getLogger('openalex.snapshot.replay')
+
+
+async def replay_entry(entry: FailedUpdate, client: AsyncSolrClient, max_retry: int = 3) -> Exception | None:
+    """Post the exact body of a spooled update again to the endpoint it was meant for; returns the last error if all attempts failed."""
+    docs = entry.doc_bytes()
+    body = JsonBody.array(docs) if entry.array else JsonBody(docs)
+    error: Exception | None = None
+    for retry in range(max_retry):
+        try:
+            await client.update(body, url=entry.url)
+            return None
+        except Exception as e:
+            error = e
+            if retry < (max_retry - 1):
+                logger.warning(f'Failed to replay {len(docs):,} documents from {entry.source} ({e}), will try again in {retry * 60} seconds...')
+                await asyncio.sleep(retry * 60)
+    return error
+
+
+def replay_failed(
+    spool_dir: Annotated[Path, typer.Option(help='Directory with the failed batches (`--spool-dir` of ingest, diff-ingest, or transfer)')],
+    config_file: Annotated[Path, typer.Option(help='Path to config file')],
+    max_inflight: Annotated[int, typer.Option(help='Number of update requests to keep open at once')] = 4,
+    max_retry: Annotated[int, typer.Option(help='Attempts per batch before it is spooled again')] = 3,
+    http2: Annotated[bool, typer.Option(help='Talk to solr via HTTP/2 (requires `h2`)')] = False,
+    compress_level: Annotated[int, typer.Option(help='gzip level to compress update requests with (0 = off, solr must accept gzip)')] = 0,
+    loglevel: Annotated[str, typer.Option(help='Log level')] = 'INFO',
+) -> None:
+    """Re-post batches that were written to a dead-letter spool because solr did not accept them.
+
+    Every batch is posted to the update endpoint it was spooled for; the config only provides the credentials.
+    Spool files that were replayed are moved to `replayed/` in the spool directory. Batches that fail again
+    are written to a new spool file in the same directory, so the command can simply be run again later.
+    Documents are full documents or atomic updates, so posting them more than once (e.g. after an interrupted replay) is harmless.
+    """
+    config = setup_ingest(config_file=config_file, loglevel=loglevel)
+    files = sorted(spool_dir.glob(SPOOL_GLOB))
+    logger.info(f'Replaying {len(files):,} spool files from {spool_dir}')
+    retry_spool = DeadLetterSpool(spool_dir, name='replay', url=f'{config.OPENALEX.solr_url}/update/json')
+    n_posted = 0
+
+    def replayed(entry: FailedUpdate, error: Exception | None) -> None:
+        nonlocal n_posted
+        if error is None:
+            n_posted += len(entry.docs)
+        else:
+            logger.error(f'Failed to replay {len(entry.docs):,} documents from {entry.source}: {error}')
+            retry_spool.add(entry.doc_bytes(), array=entry.array, source=entry.source, error=error, url=entry.url)
+
+    async def replay(file: Path) -> None:
+        async with AsyncSolrClient(config.OPENALEX, max_connections=max_inflight, http2=http2, compress_level=compress_level) as client:
+            await bounded(read_spool(file), lambda entry: replay_entry(entry, client, max_retry=max_retry), replayed, max_inflight=max_inflight)
+
+    for file in files:
+        asyncio.run(replay(file))
+        (spool_dir / 'replayed').mkdir(exist_ok=True)
+        file.rename(spool_dir / 'replayed' / file.name)
+        logger.info(f'Replayed {file.name} ({n_posted:,} documents posted so far)')
+
+    commit(config.OPENALEX)
+    logger.info(
+        f'Posted {n_posted:,} documents, {retry_spool.n_docs:,} failed again' + (f' and were written to {retry_spool.file}' if retry_spool.n_docs > 0 else '')
+    )
@@ -20,6 +20,7 @@ usage() {
  echo " --bs-post           How many items to post at once to solr"
  echo " --bs-read           How many items to read at once before posting"
  echo " --commit            Commit interval (-1 is off)"
+ echo " --workers           Number of partitions to ingest in parallel"
  echo ""
  echo " -h, --help          Display this help message"
 }
@@ -33,6 +34,7 @@ bsr=50000
 bsp=1000
 skip=0
 comm=-1
+workers=1
 from_dt="1970-01-01"
 config_file=
 
@@ -67,6 +69,10 @@ while [ $# -gt 0 ]; do
       shift
       comm=$1
       ;;
+    --workers)
+      shift
+      workers=$1
+      ;;
     *)
       echo "Invalid option: $1" >&2
       usage
@@ -100,7 +106,8 @@ python snapshot/load.py --snapshot="$NACSOS_OPENALEX__SNAPSHOT_DIR" \
                         --loglevel=INFO \
                         --post-batchsize="$bsp" \
                         --read-batchsize="$bsr" \
-                        --commit-interval="$comm"
+                        --commit-interval="$comm" \
+                        --workers="$workers"
 
 deactivate
 
@@ -0,0 +1,141 @@
+import logging
+from contextlib import contextmanager
+from math import ceil
+from pathlib import Path
+from typing import IO, Generator
+
+import msgspec
+from msgspec import Struct
+
+from openalex_ingest.shared.decompress import BLOCK_SIZE, GzipBackend, iter_blocks, open_gzip, skip_bytes
+
+logger = logging.getLogger('openalex.snapshot.shards')
+
+CHECKPOINT_SPACING = 10000  # number of lines between recorded offsets in a `LineIndex`
+
+
+def _has_indexed_gzip() -> bool:
+    try:
+        import indexed_gzip  # noqa: F401
+
+        return True
+    except ImportError:
+        return False
+
+
+class LineIndex(Struct):
+    size: int  # size and mtime of the partition when it was scanned
+    mtime: float
+    n_lines: int  # including empty lines
+    checkpoints: list[tuple[int, int]]  # (line, uncompressed byte offset of that line) every `CHECKPOINT_SPACING` lines
+    gzip_index: bool = False  # whether an access point index (`.gzidx`) was exported with indexed_gzip
+
+
+class Shard(Struct, frozen=True):
+    partition: str
+    start: int  # first line (inclusive)
+    end: int  # last line (exclusive)
+    offset: int  # uncompressed byte offset of line `start`
+
+    def __str__(self) -> str:
+        return f'{self.partition}[{self.start:,}:{self.end:,}]'
+
+
+def index_files(partition: Path, index_dir: Path) -> tuple[Path, Path]:
+    """Where the line index and the indexed_gzip access point index of a partition are kept."""
+    name = f'{partition.parent.name}-{partition.stem}'
+    return index_dir / f'{name}.lines.json', index_dir / f'{name}.gzidx'
+
+
+def _scan(f_in: IO[bytes]) -> tuple[int, list[tuple[int, int]]]:
+    n_lines = 0
+    offset = 0  # uncompressed offset of the current block
+    checkpoints = [(0, 0)]
+    last = b'\n'
+    while block := f_in.read(BLOCK_SIZE):
+        n_block = block.count(b'\n')
+        pos = -1
+        # only look for individual newlines in blocks that contain a checkpoint
+        while n_block > 0 and (n_lines % CHECKPOINT_SPACING) + n_block >= CHECKPOINT_SPACING:
+            for _ in range(CHECKPOINT_SPACING - n_lines % CHECKPOINT_SPACING):
+                pos = block.find(b'\n', pos + 1)
+                n_lines += 1
+                n_block -= 1
+            checkpoints.append((n_lines, offset + pos + 1))
+        n_lines += n_block
+        offset += len(block)
+        last = block[-1:]
+    if last != b'\n':
+        n_lines += 1
+    if len(checkpoints) > 1 and checkpoints[-1][0] == n_lines:
+        checkpoints.pop()
+    return n_lines, checkpoints
+
+
+def scan_partition(partition: Path, index_dir: Path, backend: GzipBackend = GzipBackend.auto) -> LineIndex:
+    """Decompress a partition once and record where every `CHECKPOINT_SPACING`th line starts.
+
+    If indexed_gzip is installed, a zran-style access point index is exported alongside, so shards can later seek
+    into the compressed file directly. Both are kept in `index_dir` and reused until the partition changes on disk.
+    """
+    lines_file, gzidx_file = index_files(partition, index_dir)
+    stat = partition.stat()
+    if lines_file.exists():
+        index = msgspec.json.decode(lines_file.read_bytes(), type=LineIndex)
+        if index.size == stat.st_size and index.mtime == stat.st_mtime and (not index.gzip_index or gzidx_file.exists()):
+            return index
+
+    logger.info(f'Scanning {partition} for line offsets')
+    index_dir.mkdir(parents=True, exist_ok=True)
+    if _has_indexed_gzip():
+        import indexed_gzip
+
+        with indexed_gzip.IndexedGzipFile(str(partition)) as f_in:
+            n_lines, checkpoints = _scan(f_in)
+            f_in.export_index(str(gzidx_file))
+    else:
+        with open_gzip(partition, backend=backend) as f_in:
+            n_lines, checkpoints = _scan(f_in)
+
+    index = LineIndex(size=stat.st_size, mtime=stat.st_mtime, n_lines=n_lines, checkpoints=checkpoints, gzip_index=_has_indexed_gzip())
+    lines_file.write_bytes(msgspec.json.encode(index))
+    return index
+
+
+def split_partition(partition: Path, index_dir: Path, shard_size: int, backend: GzipBackend = GzipBackend.auto) -> list[Shard]:
+    """Split a partition into shards of roughly `shard_size` compressed bytes (at checkpoint granularity)."""
+    index = scan_partition(partition, index_dir, backend=backend)
+    n_shards = max(1, min(ceil(index.size / shard_size), len(index.checkpoints)))
+    step = len(index.checkpoints) / n_shards
+    bounds = [index.checkpoints[round(si * step)] for si in range(n_shards)] + [(index.n_lines, -1)]
+    return [
+        Shard(partition=str(partition), start=start, end=end, offset=offset)
+        for (start, offset), (end, _) in zip(bounds, bounds[1:], strict=False)
+        if end > start
+    ]
+
+
+@contextmanager
+def _open_at(partition: Path, offset: int, index_dir: Path | None, backend: GzipBackend) -> Generator[IO[bytes], None, None]:
+    gzidx_file = index_files(partition, index_dir)[1] if index_dir is not None else None
+    if gzidx_file is not None and gzidx_file.exists() and _has_indexed_gzip():
+        import indexed_gzip
+
+        with indexed_gzip.IndexedGzipFile(str(partition)) as f_in:
+            f_in.import_index(str(gzidx_file))
+            f_in.seek(offset)
+            yield f_in
+    else:
+        # Without access points, we have to decompress everything before the shard, which is still cheap compared to decoding it
+        with open_gzip(partition, backend=backend) as f_in:
+            skip_bytes(f_in, offset)
+            yield f_in
+
+
+def read_shard(
+    shard: Shard, index_dir: Path | None = None, backend: GzipBackend = GzipBackend.auto, block_size: int = BLOCK_SIZE
+) -> Generator[bytes, None, None]:
+    """Same as `read_lines`, but only for the lines in `shard`."""
+    with _open_at(Path(shard.partition), shard.offset, index_dir, backend) as f_in:
+        for lines in iter_blocks(f_in, block_size=block_size, n_lines=shard.end - shard.start):
+            yield from lines
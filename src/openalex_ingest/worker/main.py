@@ -1,7 +1,14 @@
+import os
+import socket
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Annotated
+from time import perf_counter
+from typing import Annotated, Callable, Generator, TypeVar
 
 import typer
 
@@ -10,15 +17,19 @@ from nacsos_data.util.academic.apis import APIEnum
 from openalex_ingest.shared.apis import APIWrapper
 from openalex_ingest.shared.crud import (
     update_default_sources,
-    get_queued_requested_for_source,
     drop_finished_from_queue,
-    drop_unforced_sources_from_queued,
-    drop_source_from_queued,
+    claim_queued_for_source,
+    release_queued,
+    renew_leases,
+    transition_queued,
 )
 from openalex_ingest.shared.db import DatabaseEngine
 from openalex_ingest.shared.models import OnConflict, SourcePriority
+from openalex_ingest.shared.schema import QueueRequests
 from openalex_ingest.shared.util import prepare_runner
 
+T = TypeVar('T')
+
 
 class MaxRuntimeException(Exception):
     pass
@@ -32,21 +43,75 @@ def source_worker(
     auth_key: str,
     logger: logging.Logger,
     oldest_first: bool,
+    worker_id: str,
+    lease_seconds: int = 600,
     created_before: datetime | None = None,
     created_after: datetime | None = None,
 ) -> int:
-    logger.info(f'Attempting to fetch {batch_size} entries in the queue for source {source}...')
-    queued = list(
-        get_queued_requested_for_source(
-            db_engine=db_engine,
-            source=source,
-            limit=batch_size,
-            oldest_first=oldest_first,
-            created_after=created_after,
-            created_before=created_before,
-        ),
+    logger.info(f'Attempting to claim {batch_size} entries in the queue for source {source}...')
+    queued = claim_queued_for_source(
+        db_engine=db_engine,
+        source=source,
+        worker_id=worker_id,
+        limit=batch_size,
+        lease_seconds=lease_seconds,
+        oldest_first=oldest_first,
+        created_after=created_after,
+        created_before=created_before,
     )
     logger.info(f'Working on {len(queued)} queued requests for source {source}')
+    queue_ids = [q.queue_id for q in queued]
+    try:
+        with renewed_leases(db_engine, worker_id=worker_id, queue_ids=queue_ids, lease_seconds=lease_seconds, logger=logger):
+            return _work_queued(db_engine, source, queued, min_abstract_len=min_abstract_len, auth_key=auth_key, logger=logger)
+    except Exception:
+        # Let other workers retry these entries right away instead of waiting for the lease to expire
+        release_queued(db_engine=db_engine, worker_id=worker_id, queue_ids=queue_ids)
+        raise
+
+
+@contextmanager
+def renewed_leases(
+    db_engine: DatabaseEngine,
+    worker_id: str,
+    queue_ids: list[int],
+    lease_seconds: int,
+    logger: logging.Logger,
+) -> Generator[None, None, None]:
+    """Renew the leases on `queue_ids` in a background thread every third of `lease_seconds` until the block is left,
+    so a batch that takes longer than `lease_seconds` (slow API, many retries) is not claimed by another worker meanwhile.
+    """
+    stop = threading.Event()
+
+    def renew() -> None:
+        while not stop.wait(lease_seconds / 3):
+            try:
+                n_renewed = renew_leases(db_engine=db_engine, worker_id=worker_id, queue_ids=queue_ids, lease_seconds=lease_seconds)
+                if n_renewed < len(queue_ids) and not stop.is_set():
+                    logger.warning(f'Only {n_renewed:,} of {len(queue_ids):,} leases could be renewed, the others expired or were released')
+            except Exception as e:
+                logger.warning(f'Failed to renew leases: {e}')
+
+    if len(queue_ids) == 0:
+        yield
+        return
+    thread = threading.Thread(target=renew, name=f'lease-{worker_id}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _work_queued(
+    db_engine: DatabaseEngine,
+    source: APIEnum | str,
+    queued: list[QueueRequests],
+    min_abstract_len: int,
+    auth_key: str,
+    logger: logging.Logger,
+) -> int:
     filtered_queue = [
         entry
         for entry in queued
@@ -84,18 +149,85 @@ def source_worker(
                 session.add(request)
             session.commit()
 
-    ids_missing_abstract = list({q.queue_id for q in queued} - ids_found_abstract)
-    ids_found_abstract = list(ids_found_abstract)
+    logger.info(f'Dropping all unforced sources from current queue entries where we found an abstract: {sorted(ids_found_abstract)}')
+    logger.info(f'Dropping {source} from current queue entries where we did not find an abstract: {sorted({q.queue_id for q in queued} - ids_found_abstract)}')
+    n_updated, n_finished = transition_queued(
+        db_engine=db_engine,
+        source=source,
+        queue_ids=[q.queue_id for q in queued],
+        found_ids=list(ids_found_abstract),
+    )
+    logger.info(f'Moved {n_updated:,} queue entries on to their next source, dropped {n_finished:,} finished entries')
+    return len(queued)
+
 
-    logger.info(f'Dropping all unforced sources from current queue entries where we found an abstract: {ids_found_abstract}')
-    drop_unforced_sources_from_queued(db_engine=db_engine, queue_ids=ids_found_abstract)
+class IdleTracker:
+    """Tells the per-source loops of a concurrent worker when none of them has work left.
 
-    logger.info(f'Dropping {source} from current queue entries where we did not find an abstract: {ids_missing_abstract}')
-    drop_source_from_queued(db_engine=db_engine, source=source, queue_ids=ids_missing_abstract)
+    Entries move on to their next source after every batch, so a source that found nothing to do may get work from another
+    one later. A source therefore only counts as idle if no batch finished anywhere since it last found its queue empty.
+    """
+
+    def __init__(self, sources: list[str]):
+        self.lock = threading.Lock()
+        self.generation = 0  # number of batches with work finished so far
+        self.idle_since: dict[str, int | None] = dict.fromkeys(sources)
+        self.done = threading.Event()
+
+    def update(self, source: str, n_processed: int, generation: int) -> None:
+        """Record the result of a batch of `source` that was claimed when `generation` batches had finished."""
+        with self.lock:
+            if n_processed > 0:
+                self.generation += 1
+                self.idle_since[source] = None
+            else:
+                self.idle_since[source] = generation
+            if all(since == self.generation for since in self.idle_since.values()):
+                self.done.set()
+
+
+def source_loop(
+    work: Callable[..., int],
+    source: str,
+    batch_size: int,
+    min_interval: float,
+    idle_wait: float,
+    tracker: IdleTracker,
+    end_time: datetime,
+    logger: logging.Logger,
+) -> int:
+    """Work on `source` in its own thread until all sources ran out of work or `end_time` is reached.
+    Batches start at least `min_interval` seconds apart; without work, the source checks again after `idle_wait` seconds.
+    """
+    n_total = 0
+    while not tracker.done.is_set() and end_time > datetime.now():
+        started = perf_counter()
+        generation = tracker.generation
+        try:
+            n_processed = work(source=source, batch_size=batch_size, logger=logger)
+        except Exception as e:
+            logger.error(e)
+            logger.exception(e)
+            n_processed = 0
+        n_total += n_processed
+        tracker.update(source, n_processed, generation)
+
+        wait = max(min_interval, idle_wait if n_processed == 0 else 0) - (perf_counter() - started)
+        tracker.done.wait(timeout=max(0.0, min(wait, (end_time - datetime.now()).total_seconds())))
+    logger.info(f'Stopping after processing {n_total:,} entries for {source}')
+    return n_total
 
-    logger.info('Dropping finished queue entries...')
-    drop_finished_from_queue(db_engine=db_engine)
-    return len(queued)
+
+def parse_per_source(values: list[str] | None, cast: Callable[[str], T]) -> dict[str, T]:
+    """Parse options of the form "SOURCE,VALUE" (as in `--source-batch-size DIMENSIONS,50`)."""
+    parsed: dict[str, T] = {}
+    for item in values or []:
+        try:
+            source, value = item.split(',', 1)
+            parsed[source.strip()] = cast(value.strip())
+        except ValueError as e:
+            raise typer.BadParameter(f'Expected "SOURCE,VALUE", got "{item}"') from e
+    return parsed
 
 
 def main(
@@ -103,21 +235,68 @@ def main(
     max_runtime: Annotated[int, typer.Option(help='Number of seconds for this script to run before stopping')] = 5 * 60,
     sources: Annotated[list[str] | None, typer.Option(help='Sources to include')] = None,
     batch_size: Annotated[int, typer.Option(help='Number of queue entries per source per loop')] = 25,
+    source_batch_size: Annotated[list[str] | None, typer.Option(help='Batch size for one source as "SOURCE,N" (default: --batch-size)')] = None,
     min_abstract_len: Annotated[int, typer.Option(help='Minimum length before we accept something to be an abstract')] = 25,
     oldest_first: Annotated[bool, typer.Option('--oldest-first/--latest-first', help='Decide which way to order the queue')] = False,
     created_after: Annotated[datetime | None, typer.Option(help='Filter queue to entries added after this date')] = None,
     created_before: Annotated[datetime | None, typer.Option(help='Filter queue to entries added before this date')] = None,
+    worker_id: Annotated[str | None, typer.Option(help='Name to lease queue entries under (default: <hostname>-<pid>)')] = None,
+    lease_seconds: Annotated[int, typer.Option(help='Seconds before entries of a crashed worker can be claimed again (renewed while a batch runs)')] = 600,
+    concurrent: Annotated[bool, typer.Option(help='Work on all sources at the same time, each in its own thread')] = False,
+    min_interval: Annotated[list[str] | None, typer.Option(help='With --concurrent, minimum seconds between batches of a source as "SOURCE,SECONDS"')] = None,
+    idle_wait: Annotated[float, typer.Option(help='With --concurrent, seconds before a source without work checks its queue again')] = 30,
     loglevel: Annotated[str, typer.Option(help='Log verbosity')] = 'INFO',
 ):
     logger, settings, db_engine = prepare_runner(config=config, loglevel=loglevel, logger_name='queue-runner', run_log_init=True)
     start_time = datetime.now()
     delta = timedelta(seconds=max_runtime)
     end_time = start_time + delta
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}'
+    logger.info(f'Claiming queue entries as {worker_id}')
     if sources is None or len(sources) == 0:
         sources = [APIEnum.DIMENSIONS.value, APIEnum.SCOPUS.value, APIEnum.PUBMED.value, APIEnum.WOS.value]
+    batch_sizes = parse_per_source(source_batch_size, int)
+    min_intervals = parse_per_source(min_interval, float)
+
+    work = partial(
+        source_worker,
+        db_engine=db_engine,
+        min_abstract_len=min_abstract_len,
+        auth_key=settings.CACHE_AUTH_KEY,
+        oldest_first=oldest_first,
+        worker_id=worker_id,
+        lease_seconds=lease_seconds,
+        created_after=created_after,
+        created_before=created_before,
+    )
 
     logger.info('Replace empty source fields with default order...')
     update_default_sources(db_engine=db_engine)
+    logger.info(f'Dropped {drop_finished_from_queue(db_engine=db_engine):,} finished queue entries left over from earlier runs')
+
+    if concurrent:
+        # All threads share the connection pool of `db_engine`
+        logger.info(f'Working on {len(sources)} sources concurrently until {end_time}')
+        tracker = IdleTracker(sources)
+        with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix='source') as pool:
+            futures = {
+                source: pool.submit(
+                    source_loop,
+                    work,
+                    source=source,
+                    batch_size=batch_sizes.get(source, batch_size),
+                    min_interval=min_intervals.get(source, 0),
+                    idle_wait=idle_wait,
+                    tracker=tracker,
+                    end_time=end_time,
+                    logger=logger.getChild(source),
+                )
+                for source in sources
+            }
+            n_totals = {source: future.result() for source, future in futures.items()}
+        logger.info(f'Finished work after {datetime.now() - start_time}, processed {", ".join(f"{n:,} for {s}" for s, n in n_totals.items())}')
+        return
+
     n_loops = 0
     n_processed = 1
     while n_processed > 0 and end_time > datetime.now():
@@ -131,17 +310,7 @@ def main(
                 break
 
             try:
-                n_processed += source_worker(
-                    db_engine=db_engine,
-                    source=source,
-                    batch_size=batch_size,
-                    logger=logger,
-                    min_abstract_len=min_abstract_len,
-                    auth_key=settings.CACHE_AUTH_KEY,
-                    oldest_first=oldest_first,
-                    created_after=created_after,
-                    created_before=created_before,
-                )
+                n_processed += work(source=source, batch_size=batch_sizes.get(source, batch_size), logger=logger)
             except Exception as e:
                 logger.error(e)
                 logger.exception(e)
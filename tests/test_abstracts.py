@@ -0,0 +1,48 @@
+import pytest
+from nacsos_data.models.openalex import invert_abstract
+
+from openalex_ingest.snapshot.translate import reconstruct_abstract
+
+REGULAR = [
+    {},
+    {'We': [0], 'study': [1], 'climate': [2, 4], 'and': [3]},
+    {'b': [1], 'a': [0]},
+]
+
+IRREGULAR = [
+    {'a': [0, 2], 'b': [2]},  # gap at position 1 and duplicate position 2
+    {'a': [1], 'b': [1]},  # duplicate position, nothing at position 0
+    {'a': [0, 10], 'b': [1]},  # out of range
+    {'positions': [3], 'with': [0], 'gaps': [1], 'and': [7, 7]},  # abstract of the fixture work W2000000004
+]
+
+
+def invert_v1(inverted_index: dict[str, list[int]]) -> str:
+    """Python port of the original inverter in deprecated/ingest_v1/shared/cyth/invert_index.pyx"""
+    abstract_length = len([1 for idxs in inverted_index.values() for _ in idxs])
+    abstract = [''] * abstract_length
+    for token, positions in inverted_index.items():
+        for position in positions:
+            if position < abstract_length:
+                abstract[position] = token
+    return ' '.join(abstract)
+
+
+@pytest.mark.parametrize('inverted_index', REGULAR + IRREGULAR)
+def test_matches_v1_inverter(inverted_index: dict[str, list[int]]) -> None:
+    assert reconstruct_abstract(inverted_index) == invert_v1(inverted_index)
+
+
+@pytest.mark.parametrize('inverted_index', REGULAR + IRREGULAR)
+def test_matches_invert_abstract(inverted_index: dict[str, list[int]]) -> None:
+    assert reconstruct_abstract(inverted_index) == invert_abstract(inverted_index)
+
+
+def test_gaps_stay_empty() -> None:
+    assert reconstruct_abstract({'a': [0, 2], 'b': [2]}) == 'a  b'
+
+
+def test_negative_positions_are_dropped() -> None:
+    # the original inverter would have written these into slots counted from the end
+    assert reconstruct_abstract({'a': [-1], 'b': [0]}) == 'b '
+    assert reconstruct_abstract({'a': [3], 'b': [-1], 'c': [0], 'd': [1]}) == 'c d  a'
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+import orjson as json
+import pytest
+from msgspec.json import Decoder
+from nacsos_data.models.openalex import WorksSchema
+from nacsos_data.util.academic.apis.openalex import translate_work_to_solr
+
+from openalex_ingest.snapshot.match.structs import Work
+from openalex_ingest.snapshot.translate import compare_documents, translate_work
+
+FIXTURE_WORKS = Path(__file__).parent.parent / 'src' / 'openalex_ingest' / 'snapshot' / 'fixtures' / 'works.jsonl'
+LINES = {json.loads(line)['id'].rsplit('/', 1)[-1]: line for line in FIXTURE_WORKS.read_bytes().splitlines() if line.strip()}
+
+NESTED = ['authorships', 'locations', 'grants', 'awards', 'funders', 'referenced_works', 'indexed_in', 'keywords', 'concepts', 'topics']
+
+
+def msgspec_engine(line: bytes) -> dict:
+    return translate_work(Decoder(Work).decode(line), source='OpenAlex', authorship_limit=50)
+
+
+def pydantic_engine(line: bytes) -> dict:
+    return translate_work_to_solr(WorksSchema.model_validate(json.loads(line)), source='OpenAlex', authorship_limit=50)
+
+
+@pytest.mark.parametrize('work_id', sorted(LINES))
+def test_engines_agree(work_id: str) -> None:
+    assert compare_documents(pydantic_engine(LINES[work_id]), msgspec_engine(LINES[work_id])) == []
+
+
+def test_irregular_abstract() -> None:
+    # gap at position 2, nothing at position 4, and a duplicate position 7 past the end
+    assert msgspec_engine(LINES['W2000000004'])['abstract'] == 'with gaps  positions '
+    assert pydantic_engine(LINES['W2000000004'])['abstract'] == 'with gaps  positions '
+
+
+@pytest.mark.parametrize('work_id', sorted(LINES))
+def test_no_null_in_nested_fields(work_id: str) -> None:
+    doc = msgspec_engine(LINES[work_id])
+    for field in NESTED:
+        if doc.get(field) is not None:
+            assert b'null' not in json.dumps(json.loads(doc[field])), field